@@ -10,7 +10,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 from app.core.config import settings
 from app.core.database import Base
-from app.models import User, Task  # Импорт всех моделей
+from app.models import User, Task, TaskCounter, OutboxEvent  # Импорт всех моделей
 
 config = context.config
 config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
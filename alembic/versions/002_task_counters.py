@@ -0,0 +1,47 @@
+"""Task counters
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Денормализованные счетчики активных задач по статусам
+    op.create_table(
+        'task_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'status',
+            postgresql.ENUM('PENDING', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', name='taskstatus', create_type=False),
+            nullable=False
+        ),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'status')
+    )
+    
+    # Заполнение по существующим задачам
+    op.execute(
+        """
+        INSERT INTO task_counters (user_id, status, count)
+        SELECT user_id, status, count(*)
+        FROM tasks
+        WHERE NOT is_deleted
+        GROUP BY user_id, status
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_counters')
@@ -0,0 +1,55 @@
+"""Task access path indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE/DROP INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        # Списки задач пользователя: user_id = ? AND NOT is_deleted ORDER BY created_at DESC, id DESC
+        op.create_index(
+            'ix_tasks_user_created_active',
+            'tasks',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_where=sa.text('NOT is_deleted'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        # То же с фильтром по статусу и пересчет счетчиков
+        op.create_index(
+            'ix_tasks_user_status_created_active',
+            'tasks',
+            ['user_id', 'status', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_where=sa.text('NOT is_deleted'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        
+        # Дублируют первичный ключ или не используются запросами
+        op.drop_index('ix_tasks_id', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_title', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_status', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_is_deleted', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_id', table_name='users', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_id', 'users', ['id'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_is_deleted', 'tasks', ['is_deleted'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_status', 'tasks', ['status'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_id', 'tasks', ['id'], postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_tasks_user_status_created_active', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_user_created_active', table_name='tasks', postgresql_concurrently=True, if_exists=True)
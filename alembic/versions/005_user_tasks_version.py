@@ -0,0 +1,27 @@
+"""User tasks version
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Версия задач пользователя для ETag (константный DEFAULT не переписывает таблицу)
+    op.add_column(
+        'users',
+        sa.Column('tasks_version', sa.BigInteger(), server_default='0', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'tasks_version')
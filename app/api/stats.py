@@ -2,30 +2,42 @@
 API endpoints для статистики
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_read_db
+from app.core.rate_limit import rate_limiter
+from app.core.etag import make_etag, etag_headers, etag_matches, not_modified
+from app.core.responses import model_response
+from app.schemas.task import TaskStatsResponse
 from app.services.task_service import TaskService
 from app.services.user_service import UserService
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from app.services.result_cache import result_cache
 
-router = APIRouter(prefix="/api/stats", tags=["stats"])
+router = APIRouter(prefix="/api/stats", tags=["stats"], dependencies=[Depends(rate_limiter)])
 
-# Rate limiter (будет инициализирован в main.py)
-limiter = Limiter(key_func=get_remote_address)
 
-
-@router.get("")
+@router.get("", response_model=TaskStatsResponse)
 async def get_statistics(
     telegram_id: int = Query(..., description="Telegram ID пользователя"),
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить статистику по задачам"""
-    user = await UserService.get_user_by_telegram_id(db, telegram_id)
+    user = await UserService.get_user_version(db, telegram_id)
     if not user:
-        return {"total": 0, "completed": 0, "pending": 0, "in_progress": 0}
+        return model_response(TaskStatsResponse(total=0, completed=0, pending=0, in_progress=0))
+    
+    user_id, version = user
+    etag = make_etag(user_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    headers = etag_headers(etag)
+    
+    async def build():
+        stats = await TaskService.get_statistics(db, user_id)
+        return model_response(TaskStatsResponse(**stats), headers=headers)
     
-    stats = await TaskService.get_statistics(db, user.id)
-    return stats
+    return await result_cache.response(result_cache.key(user_id, version, "stats"), build, headers)
 
@@ -2,26 +2,104 @@
 API endpoints для задач
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.services.user_service import UserService
-from app.core.database import get_db
-from app.models.task import TaskStatus
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.rate_limit import rate_limiter
+from app.core.etag import make_etag, etag_headers, etag_matches, not_modified
+from app.core.export import ExportFormat, MEDIA_TYPES, ndjson_chunks, csv_chunks, gzip_chunks
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.responses import model_response, json_response
+from app.models.task import Task, TaskStatus
 from app.schemas.task import (
     TaskCreate,
     TaskUpdate,
     TaskResponse,
-    TaskListResponse
+    TaskListResponse,
+    TaskSort,
+    TaskBatchCreate,
+    TaskBatchIds,
+    TaskBatchStatus,
+    TaskBatchItemResult,
+    TaskBatchResponse,
+    TaskImportResult
 )
-from app.services.task_service import TaskService
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from app.services.task_service import TaskService, TASK_COLUMNS
+from app.services.import_service import ImportService
+from app.services.result_cache import result_cache
+
+router = APIRouter(
+    prefix="/api/tasks",
+    tags=["tasks"],
+    dependencies=[Depends(rate_limiter)]
+)
+
+
+# Поля TaskResponse, доступные для проекции через fields=
+TASK_FIELDS = {column.key: column for column in TASK_COLUMNS}
+
+
+def _parse_fields(fields: str) -> list[str]:
+    """Разобрать список полей проекции"""
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in TASK_FIELDS]
+    if not names or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Unknown fields: {', '.join(unknown) or fields}. "
+                f"Allowed: {', '.join(TASK_FIELDS)}"
+            )
+        )
+    return names
+
+
+def _next_cursor(tasks: list, sort: TaskSort) -> str:
+    """Курсор после последней задачи страницы"""
+    return encode_cursor(tasks[-1].created_at, tasks[-1].id, sort.value)
 
-router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
-# Rate limiter (будет инициализирован в main.py)
-limiter = Limiter(key_func=get_remote_address)
+def _task_list(
+    tasks: list,
+    projection: Optional[list[str]],
+    headers: Optional[dict] = None,
+    **meta
+):
+    """Ответ со списком задач: полные TaskResponse или только поля проекции"""
+    if projection is None:
+        return model_response(TaskListResponse(items=tasks, **meta), headers=headers)
+    
+    payload = TaskListResponse(items=[], **meta).model_dump()
+    payload["items"] = [{name: task._mapping[name] for name in projection} for task in tasks]
+    return json_response(payload, headers=headers)
+
+
+def _batch_results(ids: list[int], tasks: dict, with_task: bool = True) -> TaskBatchResponse:
+    """Результаты пакетной операции в порядке запроса (без повторов ID)"""
+    items = []
+    for task_id in ids:
+        task = tasks.get(task_id)
+        if task is None:
+            items.append(TaskBatchItemResult(id=task_id, ok=False, error="not_found"))
+        else:
+            items.append(TaskBatchItemResult(
+                id=task_id,
+                ok=True,
+                task=TaskResponse.model_validate(task) if with_task else None
+            ))
+    return TaskBatchResponse(items=items)
+
+
+async def _batch_user_id(db: AsyncSession, telegram_id: int) -> int:
+    """ID пользователя для пакетной операции"""
+    user_id = await UserService.get_user_id(db, telegram_id)
+    if not user_id:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_id
 
 
 @router.post("", response_model=TaskResponse, status_code=201)
@@ -37,51 +115,231 @@ async def create_task(
     task = await TaskService.create_task(
         db, task_data, telegram_id, username, first_name, last_name
     )
-    return task
+    return model_response(TaskResponse.model_validate(task), status_code=201)
+
+
+@router.post("/batch", response_model=TaskBatchResponse, status_code=201)
+async def create_tasks(
+    batch: TaskBatchCreate,
+    telegram_id: int = Query(..., description="Telegram ID пользователя"),
+    username: Optional[str] = Query(None, description="Username пользователя"),
+    first_name: Optional[str] = Query(None, description="Имя пользователя"),
+    last_name: Optional[str] = Query(None, description="Фамилия пользователя"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Создать несколько задач одним запросом"""
+    tasks = await TaskService.create_tasks(
+        db, batch.items, telegram_id, username, first_name, last_name
+    )
+    items = [
+        TaskBatchItemResult(id=task.id, ok=True, task=TaskResponse.model_validate(task))
+        for task in tasks
+    ]
+    return model_response(TaskBatchResponse(items=items), status_code=201)
+
+
+@router.post("/batch/complete", response_model=TaskBatchResponse)
+async def complete_tasks(
+    batch: TaskBatchIds,
+    telegram_id: int = Query(..., description="Telegram ID пользователя"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Завершить несколько задач"""
+    ids = list(dict.fromkeys(batch.ids))
+    user_id = await _batch_user_id(db, telegram_id)
+    tasks = await TaskService.complete_tasks(db, ids, user_id)
+    return model_response(_batch_results(ids, {task.id: task for task in tasks}))
+
+
+@router.post("/batch/status", response_model=TaskBatchResponse)
+async def update_tasks_status(
+    batch: TaskBatchStatus,
+    telegram_id: int = Query(..., description="Telegram ID пользователя"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Перевести несколько задач в статус"""
+    ids = list(dict.fromkeys(batch.ids))
+    user_id = await _batch_user_id(db, telegram_id)
+    tasks = await TaskService.update_tasks_status(db, ids, user_id, batch.status)
+    return model_response(_batch_results(ids, {task.id: task for task in tasks}))
+
+
+@router.post("/batch/delete", response_model=TaskBatchResponse)
+async def delete_tasks(
+    batch: TaskBatchIds,
+    telegram_id: int = Query(..., description="Telegram ID пользователя"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Удалить несколько задач"""
+    ids = list(dict.fromkeys(batch.ids))
+    user_id = await _batch_user_id(db, telegram_id)
+    deleted = await TaskService.delete_tasks(db, ids, user_id)
+    return model_response(_batch_results(ids, dict.fromkeys(deleted, True), with_task=False))
 
 
 @router.get("", response_model=TaskListResponse)
 async def get_tasks(
     telegram_id: int = Query(..., description="Telegram ID пользователя"),
-    status: Optional[TaskStatus] = Query(None, description="Фильтр по статусу"),
+    status: Optional[list[TaskStatus]] = Query(
+        None, description="Фильтр по статусу (можно несколько)"
+    ),
+    sort: TaskSort = Query(TaskSort.NEWEST, description="Сортировка по дате создания"),
+    fields: Optional[str] = Query(
+        None, description="Вернуть только эти поля, например id,title,status"
+    ),
     page: int = Query(1, ge=1, description="Номер страницы"),
     page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
-    db: AsyncSession = Depends(get_db)
+    after: Optional[str] = Query(
+        None, description="Курсор: вернуть задачи после него (вместо page)"
+    ),
+    with_total: bool = Query(False, description="Посчитать total в курсорном режиме"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Получить список задач с пагинацией"""
+    """Получить список задач с пагинацией (по номеру страницы или по курсору)"""
+    position = None
+    if after is not None:
+        try:
+            position = decode_cursor(after, sort.value)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    projection = _parse_fields(fields) if fields is not None else None
+    columns = TASK_COLUMNS
+    if projection:
+        # id и created_at нужны для курсора следующей страницы
+        columns = [TASK_FIELDS[name] for name in projection]
+        columns += [c for c in (Task.id, Task.created_at) if c.key not in projection]
+    
     # Получаем пользователя по telegram_id
-    user = await UserService.get_user_by_telegram_id(db, telegram_id)
+    user = await UserService.get_user_version(db, telegram_id)
     if not user:
-        return TaskListResponse(items=[], total=0, page=page, page_size=page_size, pages=0)
+        if position:
+            return _task_list([], projection, total=0 if with_total else None, page_size=page_size)
+        return _task_list([], projection, total=0, page=page, page_size=page_size, pages=0)
     
-    tasks, total = await TaskService.get_tasks(db, user.id, status, page, page_size)
+    # Если задачи не менялись, список и счетчики не запрашиваем
+    user_id, version = user
+    etag = make_etag(user_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = etag_headers(etag)
     
-    pages = (total + page_size - 1) // page_size if total > 0 else 0
+    if position:
+        tasks, has_more = await TaskService.get_tasks_after(
+            db, user_id, status, position, page_size, sort, columns
+        )
+        total = None
+        if with_total:
+            total = await TaskService.count_tasks(db, user_id, status)
+        
+        return _task_list(
+            tasks,
+            projection,
+            headers,
+            total=total,
+            page_size=page_size,
+            next_cursor=_next_cursor(tasks, sort) if has_more else None
+        )
     
-    return TaskListResponse(
-        items=[TaskResponse.model_validate(task) for task in tasks],
-        total=total,
-        page=page,
-        page_size=page_size,
-        pages=pages
-    )
+    async def build_page():
+        tasks, total = await TaskService.get_tasks(
+            db, user_id, status, page, page_size, sort, columns
+        )
+        
+        pages = (total + page_size - 1) // page_size if total > 0 else 0
+        has_more = tasks and page * page_size < total
+        
+        return _task_list(
+            tasks,
+            projection,
+            headers,
+            total=total,
+            page=page,
+            page_size=page_size,
+            pages=pages,
+            next_cursor=_next_cursor(tasks, sort) if has_more else None
+        )
+    
+    if page == 1:
+        # Первая страница - самый частый запрос, ее ответ кэшируется до изменения задач
+        key = result_cache.key(user_id, version, "tasks", {
+            "status": sorted(status or []),
+            "sort": sort.value,
+            "fields": projection,
+            "page_size": page_size,
+        })
+        return await result_cache.response(key, build_page, headers)
+    
+    return await build_page()
+
+
+@router.get("/export")
+async def export_tasks(
+    telegram_id: int = Query(..., description="Telegram ID пользователя"),
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Формат выгрузки"),
+    status: Optional[list[TaskStatus]] = Query(
+        None, description="Фильтр по статусу (можно несколько)"
+    ),
+    gzip: bool = Query(False, description="Сжать ответ (Content-Encoding: gzip)"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Выгрузить все задачи пользователя потоком (от старых к новым)"""
+    user_id = await UserService.get_user_id(db, telegram_id)
+    
+    async def batches():
+        if user_id:
+            async for rows in TaskService.stream_tasks(
+                db, user_id, status, settings.EXPORT_BATCH_SIZE
+            ):
+                yield rows
+    
+    if format == ExportFormat.CSV:
+        chunks = csv_chunks(batches(), list(TASK_FIELDS))
+    else:
+        chunks = ndjson_chunks(batches())
+    
+    headers = {"Content-Disposition": f'attachment; filename="tasks.{format.value}"'}
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@router.post("/import", response_model=TaskImportResult)
+async def import_tasks(
+    request: Request,
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Формат тела запроса"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Импортировать задачи разных пользователей (поле telegram_id) из потока NDJSON/CSV"""
+    result = await ImportService.import_tasks(db, request.stream(), format)
+    return model_response(result)
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: int,
     telegram_id: int = Query(..., description="Telegram ID пользователя"),
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить задачу по ID"""
-    user = await UserService.get_user_by_telegram_id(db, telegram_id)
+    user = await UserService.get_user_version(db, telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    task = await TaskService.get_task(db, task_id, user.id)
+    # Сначала задача: несуществующая задача - 404, а не 304 по ETag пользователя
+    user_id, version = user
+    task = await TaskService.get_task(db, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    
+    etag = make_etag(user_id, version, task.id, int(task.updated_at.timestamp() * 1_000_000))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return model_response(TaskResponse.model_validate(task), headers=etag_headers(etag))
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
@@ -92,14 +350,14 @@ async def update_task(
     db: AsyncSession = Depends(get_db)
 ):
     """Обновить задачу"""
-    user = await UserService.get_user_by_telegram_id(db, telegram_id)
-    if not user:
+    user_id = await UserService.get_user_id(db, telegram_id)
+    if not user_id:
         raise HTTPException(status_code=404, detail="User not found")
     
-    task = await TaskService.update_task(db, task_id, user.id, task_data)
+    task = await TaskService.update_task(db, task_id, user_id, task_data)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return model_response(TaskResponse.model_validate(task))
 
 
 @router.delete("/{task_id}", status_code=204)
@@ -109,11 +367,11 @@ async def delete_task(
     db: AsyncSession = Depends(get_db)
 ):
     """Удалить задачу"""
-    user = await UserService.get_user_by_telegram_id(db, telegram_id)
-    if not user:
+    user_id = await UserService.get_user_id(db, telegram_id)
+    if not user_id:
         raise HTTPException(status_code=404, detail="User not found")
     
-    success = await TaskService.delete_task(db, task_id, user.id)
+    success = await TaskService.delete_task(db, task_id, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -125,12 +383,12 @@ async def complete_task(
     db: AsyncSession = Depends(get_db)
 ):
     """Завершить задачу"""
-    user = await UserService.get_user_by_telegram_id(db, telegram_id)
-    if not user:
+    user_id = await UserService.get_user_id(db, telegram_id)
+    if not user_id:
         raise HTTPException(status_code=404, detail="User not found")
     
-    task = await TaskService.complete_task(db, task_id, user.id)
+    task = await TaskService.complete_task(db, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return model_response(TaskResponse.model_validate(task))
 
@@ -0,0 +1,136 @@
+"""
+Кэширование в памяти процесса и в Redis
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from redis.exceptions import RedisError
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """LRU-кэш в памяти процесса с ограничением размера и временем жизни записей"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получить значение или None, если его нет или оно устарело"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохранить значение, вытеснив самое старое при переполнении"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: Hashable) -> None:
+        """Удалить значение"""
+        self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Очистить кэш и счетчики"""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self) -> dict:
+        """Размер и счетчики попаданий"""
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class TwoTierCache:
+    """Двухуровневый кэш целых значений: память процесса, затем (опционально) Redis"""
+    
+    def __init__(self, namespace: str, maxsize: int, ttl: int, use_redis: bool = False):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.local = TTLCache(maxsize, ttl)
+        self.redis_hits = 0
+        self.redis_misses = 0
+    
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+    
+    async def get(self, key: Hashable) -> Optional[int]:
+        """Получить значение из памяти или Redis"""
+        value = self.local.get(key)
+        if value is not None or not self.use_redis:
+            return value
+        
+        try:
+            raw = await get_redis().get(self._key(key))
+        except RedisError as e:
+            logger.warning(f"Redis недоступен для кэша {self.namespace}: {e}")
+            return None
+        
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        
+        self.redis_hits += 1
+        value = int(raw)
+        self.local.set(key, value)
+        return value
+    
+    async def set(self, key: Hashable, value: int) -> None:
+        """Сохранить значение на обоих уровнях"""
+        self.local.set(key, value)
+        if not self.use_redis:
+            return
+        
+        try:
+            await get_redis().set(self._key(key), value, ex=self.ttl)
+        except RedisError as e:
+            logger.warning(f"Redis недоступен для кэша {self.namespace}: {e}")
+    
+    async def delete(self, key: Hashable) -> None:
+        """Удалить значение на обоих уровнях"""
+        self.local.delete(key)
+        if not self.use_redis:
+            return
+        
+        try:
+            await get_redis().delete(self._key(key))
+        except RedisError as e:
+            logger.warning(f"Redis недоступен для кэша {self.namespace}: {e}")
+    
+    def clear(self) -> None:
+        """Очистить локальный уровень и счетчики"""
+        self.local.clear()
+        self.redis_hits = 0
+        self.redis_misses = 0
+    
+    def stats(self) -> dict:
+        """Счетчики попаданий по уровням"""
+        return {
+            "local": self.local.stats(),
+            "redis": {
+                "enabled": self.use_redis,
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+            },
+        }
@@ -2,18 +2,63 @@
 Настройка подключения к базе данных
 """
 
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Iterable, Optional
+from fastapi import Request
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import DB_POOL_WAIT
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений с замером ожидания свободного соединения"""
+    
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started_at)
+
+
+def _connect_args(url: str) -> dict:
+    """Параметры драйвера: размер кэша подготовленных выражений asyncpg"""
+    if not url.startswith("postgresql+asyncpg"):
+        return {}
+    if settings.DATABASE_PGBOUNCER:
+        # Через pgbouncer (transaction) соединения сервера меняются между транзакциями:
+        # кэш выражений бесполезен, а имена по порядку (__asyncpg_stmt_1__) совпадают
+        # у разных клиентов, поэтому имена уникальные
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE}
+
 
 # Создание асинхронного движка
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=settings.DEBUG,
+    echo=settings.SQL_ECHO,
     future=True,
     pool_pre_ping=True,
+    poolclass=TimedQueuePool,
     pool_size=10,
-    max_overflow=20
+    max_overflow=20,
+    query_cache_size=settings.SQL_COMPILED_CACHE_SIZE,
+    connect_args=_connect_args(settings.DATABASE_URL)
 )
 
 # Создание фабрики сессий
@@ -25,6 +70,92 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Движок реплики для чтения (без DATABASE_READ_URL - основная БД)
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(
+        settings.DATABASE_READ_URL,
+        echo=settings.SQL_ECHO,
+        future=True,
+        pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DATABASE_READ_POOL_SIZE,
+        max_overflow=settings.DATABASE_READ_MAX_OVERFLOW,
+        query_cache_size=settings.SQL_COMPILED_CACHE_SIZE,
+        connect_args=_connect_args(settings.DATABASE_READ_URL)
+    )
+    ReadSessionLocal = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+else:
+    read_engine = engine
+    ReadSessionLocal = AsyncSessionLocal
+
+
+class RecentWriters:
+    """Окно read-your-writes: telegram_id, недавно изменявшие данные
+    
+    Их чтения идут в основную БД, чтобы пользователь видел свои изменения несмотря
+    на отставание реплики.
+    
+    backend redis - окно общее для всех процессов API, memory - только в своем процессе.
+    """
+    
+    def __init__(self, backend: str, window: float):
+        self.use_redis = backend == "redis"
+        self.window = window
+        self.local = TTLCache(settings.USER_CACHE_SIZE, window)
+    
+    @staticmethod
+    def _key(telegram_id: str) -> str:
+        return f"recent_writer:{telegram_id}"
+    
+    async def mark(self, telegram_ids: Iterable) -> None:
+        """Открыть окно чтения из основной БД (после commit изменения)"""
+        telegram_ids = {str(telegram_id) for telegram_id in telegram_ids}
+        for telegram_id in telegram_ids:
+            self.local.set(telegram_id, True)
+        if not self.use_redis or not telegram_ids:
+            return
+        
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for telegram_id in telegram_ids:
+                    pipe.set(self._key(telegram_id), 1, px=int(self.window * 1000))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Redis недоступен для read-your-writes: {e}")
+    
+    async def is_recent(self, telegram_id: str) -> bool:
+        """Менял ли пользователь данные в пределах окна"""
+        if self.local.get(telegram_id) is not None:
+            return True
+        if not self.use_redis:
+            return False
+        
+        try:
+            return bool(await get_redis().exists(self._key(telegram_id)))
+        except RedisError as e:
+            # Без Redis неизвестно, чья запись свежее реплики: читаем из основной БД
+            logger.warning(f"Redis недоступен для read-your-writes: {e}")
+            return True
+    
+    def clear(self) -> None:
+        """Очистить окно в памяти процесса"""
+        self.local.clear()
+
+
+recent_writers = RecentWriters(
+    settings.READ_YOUR_WRITES_BACKEND,
+    settings.READ_YOUR_WRITES_WINDOW
+)
+
+# telegram_id, чьи изменения зафиксированы в текущем HTTP-запросе (помимо telegram_id запроса)
+committed_writers: ContextVar[Optional[set]] = ContextVar("committed_writers", default=None)
+
 # Базовый класс для моделей
 Base = declarative_base()
 
@@ -37,3 +168,79 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+
+def note_writers(telegram_ids: Iterable) -> None:
+    """Запомнить авторов зафиксированных изменений (вызывается после commit)"""
+    writers = committed_writers.get()
+    if writers is not None:
+        writers.update(str(telegram_id) for telegram_id in telegram_ids)
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware: окно read-your-writes для авторов успешных изменений
+    
+    Окно открывается до отправки ответа, поэтому следующий запрос клиента его уже видит,
+    и только для изменений, которые дошли до commit: ответ изменяющего запроса с кодом
+    меньше 400 (telegram_id из запроса) и пользователи, отмеченные через note_writers.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in ("GET", "HEAD")
+            or ReadSessionLocal is AsyncSessionLocal
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        writers = set()
+        token = committed_writers.set(writers)
+        started = False
+        
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                if message["status"] < 400:
+                    telegram_id = Request(scope).query_params.get("telegram_id")
+                    if telegram_id:
+                        writers.add(telegram_id)
+                await recent_writers.mark(writers)
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            committed_writers.reset(token)
+            # Исключение до ответа: изменения, успевшие пройти commit, все равно учитываются
+            if not started:
+                await recent_writers.mark(writers)
+
+
+async def read_session_factory(telegram_id: Optional[str]) -> async_sessionmaker:
+    """Фабрика сессий для чтения: реплика, если пользователь недавно ничего не менял"""
+    if ReadSessionLocal is AsyncSessionLocal:
+        return AsyncSessionLocal
+    if telegram_id and await recent_writers.is_recent(telegram_id):
+        return AsyncSessionLocal
+    return ReadSessionLocal
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """Dependency для получения сессии БД только для чтения"""
+    factory = await read_session_factory(request.query_params.get("telegram_id"))
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def dialect_insert(db: AsyncSession, table):
+    """INSERT с поддержкой ON CONFLICT для диалекта текущей сессии"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
@@ -0,0 +1,36 @@
+"""
+Условные GET-запросы: ETag по версии задач пользователя
+"""
+
+from typing import Optional
+from fastapi import Response
+
+
+def make_etag(user_id: int, version: int, *parts) -> str:
+    """Сильный ETag: меняется при любом изменении задач пользователя
+    
+    parts различают ресурсы одного пользователя (например, id задачи и время ее изменения).
+    """
+    return '"' + ".".join(str(part) for part in (user_id, version, *parts)) + '"'
+
+
+def etag_headers(etag: str) -> dict:
+    """Заголовки ответа с ETag (клиент обязан перепроверять кэш)"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли If-None-Match с текущим ETag (слабое сравнение, как требует RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """Ответ 304 без тела"""
+    return Response(status_code=304, headers=etag_headers(etag))
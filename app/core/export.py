@@ -0,0 +1,68 @@
+"""
+Потоковая сериализация выгрузки задач (NDJSON/CSV, опционально gzip)
+"""
+
+import csv
+import enum
+import io
+import zlib
+from typing import AsyncIterator, Sequence
+import orjson
+from sqlalchemy import Row
+
+
+class ExportFormat(str, enum.Enum):
+    """Формат выгрузки"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _csv_value(value):
+    """Значение ячейки CSV"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+async def ndjson_chunks(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Пачки строк -> NDJSON, один кусок на пачку"""
+    async for rows in batches:
+        yield b"".join(orjson.dumps(dict(row._mapping)) + b"\n" for row in rows)
+
+
+async def csv_chunks(
+    batches: AsyncIterator[Sequence[Row]],
+    header: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """Пачки строк -> CSV с заголовком, один кусок на пачку"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    
+    async for rows in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    # Заголовок без строк, если выгрузка пустая
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Сжатие потока в формат gzip без накопления в памяти"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
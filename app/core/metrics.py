@@ -0,0 +1,294 @@
+"""
+Метрики в формате Prometheus
+
+Все обновления выполняются в потоке event loop, поэтому метрики - обычные
+словари и числа без блокировок. Значения, которые дешевле прочитать, чем
+считать (пул соединений, кэши), собираются функциями в момент запроса /metrics.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Границы корзин гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонный счетчик"""
+    type_name = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+    
+    def inc(self, *labels, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+    
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Значение, которое может уменьшаться"""
+    type_name = "gauge"
+    
+    def dec(self, *labels, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - value
+    
+    def set(self, *labels, value: float) -> None:
+        self.values[labels] = value
+
+
+class CallbackGauge:
+    """Gauge, значения которого вычисляются при сборе метрик"""
+    type_name = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], dict[tuple, float]],
+        labelnames: tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+    
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.callback().items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (счетчики корзин хранятся не накопленными)"""
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [счетчики корзин..., +Inf, сумма]
+        self.values: dict[tuple, list] = {}
+    
+    def observe(self, value: float, *labels) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+    
+    def samples(self) -> Iterable[str]:
+        names = self.labelnames + ("le",)
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                label_str = _format_labels(names, labels + (_format_value(bound),))
+                yield f"{self.name}_bucket{label_str} {cumulative}"
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_str} {_format_value(series[-1])}"
+            yield f"{self.name}_count{label_str} {cumulative}"
+
+
+class Registry:
+    """Набор метрик процесса"""
+    
+    def __init__(self):
+        self.metrics: dict[str, object] = {}
+    
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Текстовый формат экспозиции Prometheus"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+    
+    def clear(self) -> None:
+        """Сбросить накопленные значения (для тестов)"""
+        for metric in self.metrics.values():
+            if hasattr(metric, "values"):
+                metric.values.clear()
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса",
+    ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP-запросы в обработке", ("method",)
+))
+DB_QUERIES_PER_REQUEST = registry.register(Histogram(
+    "db_queries_per_request", "SQL-запросов на HTTP-запрос",
+    ("method", "route"), QUERY_COUNT_BUCKETS
+))
+DB_TIME_PER_REQUEST = registry.register(Histogram(
+    "db_query_seconds_per_request", "Суммарное время SQL-запросов на HTTP-запрос",
+    ("method", "route")
+))
+DB_POOL_WAIT = registry.register(Histogram(
+    "db_pool_wait_seconds", "Получение соединения из пула (ожидание и открытие нового)",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+))
+
+
+class RequestStats:
+    """SQL-запросы текущего HTTP-запроса"""
+    __slots__ = ("queries", "db_time")
+    
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Контекст доступен в событиях курсора: SQLAlchemy переносит его в greenlet драйвера
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_stats.get()
+    if stats is None or context is None:
+        return
+    started_at = getattr(context, "_metrics_started_at", None)
+    if started_at is not None:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started_at
+
+
+def track_queries() -> None:
+    """Считать SQL-запросы всех движков в статистику текущего HTTP-запроса"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def register_pool(engine, name: str = "primary") -> None:
+    """Gauges пула соединений движка (читаются при сборе метрик)"""
+    pool = engine.pool
+    
+    def collect(method: str) -> Callable[[], dict[tuple, float]]:
+        def callback() -> dict[tuple, float]:
+            # У StaticPool/NullPool этих счетчиков нет
+            if not hasattr(pool, method):
+                return {}
+            # QueuePool.overflow() отрицателен, пока пул не заполнен
+            return {(name,): max(getattr(pool, method)(), 0)}
+        return callback
+    
+    for metric, method, documentation in (
+        ("db_pool_size", "size", "Размер пула соединений"),
+        ("db_pool_checked_out", "checkedout", "Соединения, выданные из пула"),
+        ("db_pool_overflow", "overflow", "Соединения сверх размера пула"),
+    ):
+        _extend(metric, documentation, collect(method), ("pool",))
+
+
+def register_cache(name: str, stats: Callable[[], dict]) -> None:
+    """Счетчики попаданий кэша; stats возвращает словарь с hits и misses"""
+    def counts() -> dict[tuple, float]:
+        values = stats()
+        return {(name, "hit"): values["hits"], (name, "miss"): values["misses"]}
+    
+    def ratio() -> dict[tuple, float]:
+        values = stats()
+        total = values["hits"] + values["misses"]
+        return {(name,): values["hits"] / total if total else 0.0}
+    
+    _extend("cache_requests_total", "Обращения к кэшу", counts, ("cache", "result"))
+    _extend("cache_hit_ratio", "Доля попаданий в кэш", ratio, ("cache",))
+
+
+def _extend(metric: str, documentation: str, callback, labelnames: tuple[str, ...]) -> None:
+    existing = registry.metrics.get(metric)
+    if existing is None:
+        gauge = registry.register(CallbackGauge(metric, documentation, callback, labelnames))
+        # Счетчик попаданий монотонный, хотя считывается функцией
+        if metric.endswith("_total"):
+            gauge.type_name = "counter"
+        return
+    previous = existing.callback
+    existing.callback = lambda: {**previous(), **callback()}
+
+
+class MetricsMiddleware:
+    """ASGI middleware: длительность и число запросов в обработке, SQL на запрос"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        HTTP_REQUESTS_IN_FLIGHT.inc(method)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            HTTP_REQUESTS_IN_FLIGHT.dec(method)
+            request_stats.reset(token)
+            # Шаблон маршрута, а не путь: /api/tasks/{task_id}, а не /api/tasks/42
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.observe(elapsed, method, route, status)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, method, route)
+            DB_TIME_PER_REQUEST.observe(stats.db_time, method, route)
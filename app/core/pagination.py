@@ -0,0 +1,30 @@
+"""
+Курсорная (keyset) пагинация
+"""
+
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, task_id: int, sort: str) -> str:
+    """Закодировать позицию (created_at, id) и порядок сортировки в непрозрачный курсор"""
+    raw = json.dumps([created_at.isoformat(), task_id, sort], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[datetime, int]:
+    """Раскодировать курсор, ValueError при неверном формате или другом порядке сортировки
+    
+    Позиция имеет смысл только в том порядке, в котором выдан курсор: с другим
+    sort keyset-условие молча пропустило бы или повторило задачи.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, task_id, cursor_sort = json.loads(raw)
+        position = datetime.fromisoformat(created_at), int(task_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort")
+    return position
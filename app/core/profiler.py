@@ -0,0 +1,188 @@
+"""
+Профилирование SQL по запросам (включается SQL_PROFILE)
+
+Для каждого HTTP-запроса записываются SQL-запросы, их время и число строк,
+а также находки: повторы одинакового запроса (N+1) и загрузки связей ORM.
+Сводка отдается заголовком X-SQL-Profile, последние запросы - на /debug/sql.
+"""
+
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from itertools import count
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+PROFILE_HEADER = "x-sql-profile"
+
+# Одинаковый текст запроса с разными параметрами столько раз - похоже на N+1
+REPEAT_THRESHOLD = 3
+
+
+class QueryRecord:
+    """Один SQL-запрос"""
+    __slots__ = ("statement", "params_key", "duration", "rows", "executemany")
+    
+    def __init__(self, statement: str, params_key: int, executemany: bool):
+        self.statement = statement
+        self.params_key = params_key
+        self.executemany = executemany
+        self.duration = 0.0
+        self.rows: Optional[int] = None
+    
+    def to_dict(self) -> dict:
+        return {
+            "statement": self.statement,
+            "duration_ms": round(self.duration * 1000, 3),
+            "rows": self.rows,
+            "executemany": self.executemany,
+        }
+
+
+class RequestProfile:
+    """SQL одного HTTP-запроса"""
+    
+    def __init__(self, profile_id: int, method: str, path: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.queries: list[QueryRecord] = []
+        self.relationship_loads: Counter[str] = Counter()
+        self.elapsed = 0.0
+    
+    @property
+    def db_time(self) -> float:
+        return sum(query.duration for query in self.queries)
+    
+    def findings(self) -> list[dict]:
+        """Повторные запросы и загрузки связей"""
+        findings = []
+        duplicates = Counter((q.statement, q.params_key) for q in self.queries if not q.executemany)
+        for (statement, _), times in duplicates.items():
+            if times > 1:
+                findings.append({"type": "duplicate", "count": times, "statement": statement})
+        
+        # Один текст с разными параметрами много раз: запросы в цикле вместо одного
+        repeated = Counter(q.statement for q in self.queries if not q.executemany)
+        variants = Counter(statement for statement, _ in duplicates)
+        for statement, times in repeated.items():
+            if times >= REPEAT_THRESHOLD and variants[statement] > 1:
+                findings.append({"type": "repeated", "count": times, "statement": statement})
+        
+        for relationship, times in self.relationship_loads.items():
+            findings.append(
+                {"type": "relationship_load", "count": times, "relationship": relationship}
+            )
+        return findings
+    
+    def summary(self) -> str:
+        """Значение заголовка X-SQL-Profile"""
+        kinds = Counter(finding["type"] for finding in self.findings())
+        return (
+            f"id={self.id}; queries={len(self.queries)}; time_ms={self.db_time * 1000:.2f}; "
+            f"duplicates={kinds['duplicate']}; repeated={kinds['repeated']}; "
+            f"relationship_loads={kinds['relationship_load']}"
+        )
+    
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "query_count": len(self.queries),
+            "findings": self.findings(),
+            "queries": [query.to_dict() for query in self.queries],
+        }
+
+
+# Профиль текущего HTTP-запроса (None - профилирование выключено)
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+# Последние профили для /debug/sql
+history: deque[RequestProfile] = deque(maxlen=settings.SQL_PROFILE_HISTORY)
+_ids = count(1)
+
+
+def _params_key(parameters) -> int:
+    try:
+        return hash(repr(parameters))
+    except Exception:
+        return id(parameters)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None or context is None:
+        return
+    record = QueryRecord(statement, _params_key(parameters), executemany)
+    profile.queries.append(record)
+    context._profile_record = record
+    context._profile_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = getattr(context, "_profile_record", None)
+    if record is None:
+        return
+    record.duration = time.perf_counter() - context._profile_started_at
+    if cursor.rowcount is not None and cursor.rowcount >= 0:
+        record.rows = cursor.rowcount
+    else:
+        # Асинхронные адаптеры asyncpg/aiosqlite выбирают строки SELECT целиком при execute
+        rows = getattr(cursor, "_rows", None)
+        if isinstance(rows, list):
+            record.rows = len(rows)
+
+
+def _do_orm_execute(state):
+    profile = current_profile.get()
+    if profile is not None and state.is_relationship_load:
+        profile.relationship_loads[str(state.loader_strategy_path.path[-1])] += 1
+
+
+def install() -> None:
+    """Подключить события SQLAlchemy (пока профиль не начат, они ничего не делают)"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
+
+
+class ProfilerMiddleware:
+    """ASGI middleware: профиль SQL запроса и заголовок X-SQL-Profile"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.SQL_PROFILE
+            or scope["path"].startswith("/debug/")
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        profile = RequestProfile(next(_ids), scope["method"], scope["path"])
+        token = current_profile.set(profile)
+        
+        async def send_wrapper(message):
+            # Для потоковых ответов заголовок учитывает только запросы до начала ответа
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_HEADER.encode(), profile.summary().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.elapsed = time.perf_counter() - started_at
+            current_profile.reset(token)
+            history.append(profile)
@@ -0,0 +1,148 @@
+"""
+Ограничение частоты запросов по telegram_id
+"""
+
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Скользящее окно в Redis: удалить устаревшие отметки, добавить новую, если лимит не исчерпан.
+# Время берется из Redis, чтобы реплики API с разными часами считали одинаково.
+# Возвращает 0, если запрос разрешен, иначе миллисекунды до освобождения места в окне.
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return math.max(tonumber(oldest[2]) + window - now, 1)
+"""
+
+
+class TokenBucketLimiter:
+    """Token bucket в памяти процесса: limit запросов в минуту с пополнением равномерно"""
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+    
+    def hit(self, key: str, limit: int) -> float:
+        """Списать токен; 0 - запрос разрешен, иначе секунды до следующего токена"""
+        now = time.monotonic()
+        rate = limit / 60.0
+        tokens, updated_at = self._buckets.get(key, (float(limit), now))
+        tokens = min(float(limit), tokens + (now - updated_at) * rate)
+        
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # Вытесняются самые давно не обращавшиеся ключи
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+    
+    def reset(self) -> None:
+        """Сбросить все счетчики"""
+        self._buckets.clear()
+
+
+class RedisSlidingWindowLimiter:
+    """Скользящее окно в Redis: общий лимит для всех реплик API"""
+    
+    def __init__(self, namespace: str = "ratelimit", window: float = 60.0):
+        self.namespace = namespace
+        self.window_ms = int(window * 1000)
+        self._script = None
+    
+    async def hit(self, key: str, limit: int) -> float:
+        """Отметить запрос; 0 - запрос разрешен, иначе секунды до освобождения окна"""
+        if self._script is None:
+            self._script = get_redis().register_script(SLIDING_WINDOW_SCRIPT)
+        retry_after_ms = await self._script(
+            keys=[f"{self.namespace}:{key}"],
+            args=[self.window_ms, limit, uuid.uuid4().hex]
+        )
+        return int(retry_after_ms) / 1000.0
+    
+    def reset(self) -> None:
+        """Сбросить кэш скрипта (счетчики в Redis истекают сами)"""
+        self._script = None
+
+
+class RateLimiter:
+    """Лимиты на чтение и запись по telegram_id (или адресу клиента без него)
+    
+    Backend memory считает в процессе; backend redis - общее окно для всех реплик,
+    а при недоступности Redis запрос проверяется по лимиту в памяти.
+    """
+    
+    def __init__(self, backend: str, read_limit: int, write_limit: int):
+        self.backend = backend
+        self.limits = {"read": read_limit, "write": write_limit}
+        self.memory = TokenBucketLimiter()
+        self.redis = RedisSlidingWindowLimiter()
+    
+    @staticmethod
+    def route_class(request: Request) -> str:
+        """Класс маршрута по HTTP-методу"""
+        return "read" if request.method in ("GET", "HEAD") else "write"
+    
+    @staticmethod
+    def client_key(request: Request) -> str:
+        """Ключ клиента: telegram_id запроса, иначе IP"""
+        telegram_id = request.query_params.get("telegram_id")
+        if telegram_id:
+            return f"tg:{telegram_id}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+    
+    async def hit(self, route_class: str, client_key: str) -> float:
+        """Отметить запрос, вернуть секунды до разрешения (0 - разрешен)"""
+        limit = self.limits[route_class]
+        key = f"{route_class}:{client_key}"
+        if self.backend == "redis":
+            try:
+                return await self.redis.hit(key, limit)
+            except RedisError as e:
+                logger.warning(f"Redis недоступен для ограничения частоты: {e}")
+        return self.memory.hit(key, limit)
+    
+    async def __call__(self, request: Request) -> None:
+        """Dependency: 429 с Retry-After при превышении лимита"""
+        retry_after = await self.hit(self.route_class(request), self.client_key(request))
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    
+    def reset(self) -> None:
+        """Сбросить счетчики в памяти"""
+        self.memory.reset()
+        self.redis.reset()
+
+
+rate_limiter = RateLimiter(
+    settings.RATE_LIMIT_BACKEND,
+    read_limit=settings.RATE_LIMIT_READ_PER_MINUTE,
+    write_limit=settings.RATE_LIMIT_PER_MINUTE
+)
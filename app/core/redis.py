@@ -0,0 +1,25 @@
+"""
+Подключение к Redis
+"""
+
+from typing import Optional
+from redis.asyncio import Redis
+from app.core.config import settings
+
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Общий клиент Redis (создается при первом обращении)"""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Закрыть клиент Redis"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
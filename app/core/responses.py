@@ -0,0 +1,48 @@
+"""
+Быстрая JSON-сериализация ответов
+"""
+
+from typing import Any, Optional, Union
+import orjson
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+from app.core.config import settings
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ: pydantic-модели сериализуются сразу в байты, остальное через orjson"""
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        # orjson сам сериализует datetime и Enum
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def model_response(
+    model: BaseModel,
+    status_code: int = 200,
+    headers: Optional[dict] = None
+) -> Union[Response, BaseModel]:
+    """Ответ из готовой модели без повторной валидации и jsonable_encoder
+    
+    При FAST_JSON=False модель возвращается как есть и обрабатывается FastAPI штатно
+    (с заголовками - через jsonable_encoder).
+    """
+    if not settings.FAST_JSON:
+        if headers:
+            return JSONResponse(jsonable_encoder(model), status_code=status_code, headers=headers)
+        return model
+    return FastJSONResponse(model, status_code=status_code, headers=headers)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Ответ из произвольных данных (dict/list) в обход response_model"""
+    if settings.FAST_JSON:
+        return FastJSONResponse(content, status_code=status_code, headers=headers)
+    return JSONResponse(jsonable_encoder(content), status_code=status_code, headers=headers)
+
+
+default_response_class = FastJSONResponse if settings.FAST_JSON else JSONResponse
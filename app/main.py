@@ -2,14 +2,17 @@
 Главный файл FastAPI приложения
 """
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, read_engine, Base, ReadYourWritesMiddleware
+from app.core import metrics, profiler
+from app.core.redis import close_redis
+from app.core.responses import default_response_class
 from app.api import tasks, stats
+from app.services.user_service import user_id_cache
+from app.services.result_cache import result_cache
 
 # Создание приложения
 app = FastAPI(
@@ -17,14 +20,10 @@ app = FastAPI(
     description="API для управления задачами с Telegram ботом",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=default_response_class
 )
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +33,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Метрики: длительность запросов, SQL на запрос, пул соединений, кэши
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.track_queries()
+metrics.register_pool(engine)
+if read_engine is not engine:
+    metrics.register_pool(read_engine, "replica")
+metrics.register_cache("user_id_local", lambda: user_id_cache.stats()["local"])
+metrics.register_cache("user_id_redis", lambda: user_id_cache.stats()["redis"])
+metrics.register_cache("results", result_cache.stats)
+
+# Окно read-your-writes для авторов изменений (при DATABASE_READ_URL)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Профиль SQL по запросам (SQL_PROFILE)
+app.add_middleware(profiler.ProfilerMiddleware)
+profiler.install()
+
 # Подключение роутеров
 app.include_router(tasks.router)
 app.include_router(stats.router)
@@ -52,6 +68,9 @@ async def startup():
 async def shutdown():
     """Очистка при завершении"""
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await close_redis()
 
 
 @app.get("/")
@@ -69,3 +88,23 @@ async def health_check():
     """Проверка здоровья сервиса"""
     return {"status": "ok"}
 
+
+@app.get("/health/cache")
+async def cache_stats():
+    """Счетчики попаданий в кэши"""
+    return {"user_id": user_id_cache.stats(), "results": result_cache.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Метрики в формате Prometheus"""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/sql", include_in_schema=False)
+async def sql_profiles(limit: int = Query(20, ge=1, le=1000)):
+    """Профили SQL последних запросов, новые первыми (только при SQL_PROFILE)"""
+    if not settings.SQL_PROFILE:
+        raise HTTPException(status_code=404, detail="SQL profiling is disabled")
+    profiles = list(profiler.history)[-limit:]
+    return [profile.to_dict() for profile in reversed(profiles)]
@@ -1,5 +1,8 @@
 from app.models.user import User
 from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.task_counter import TaskCounter
+from app.models.outbox import OutboxEvent, TaskEventType
 
-__all__ = ["User", "Task", "TaskStatus", "TaskPriority"]
-
+__all__ = [
+    "User", "Task", "TaskStatus", "TaskPriority", "TaskCounter", "OutboxEvent", "TaskEventType"
+]
@@ -0,0 +1,35 @@
+"""
+Модель исходящих событий (transactional outbox)
+"""
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+import enum
+from app.core.database import Base
+
+
+class TaskEventType(str, enum.Enum):
+    """Типы событий задач"""
+    CREATED = "task.created"
+    UPDATED = "task.updated"
+    COMPLETED = "task.completed"
+    DELETED = "task.deleted"
+
+
+class OutboxEvent(Base):
+    """Событие, записанное в транзакции изменения и ожидающее публикации в RabbitMQ"""
+    __tablename__ = "outbox_events"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    task_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return (
+            f"<OutboxEvent(id={self.id}, event_type='{self.event_type}', "
+            f"task_id={self.task_id})>"
+        )
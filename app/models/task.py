@@ -2,7 +2,9 @@
 Модель задачи
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import (
+    Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, Enum as SQLEnum, text
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -29,10 +31,10 @@ class Task(Base):
     """Модель задачи"""
     __tablename__ = "tasks"
     
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(255), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    status = Column(SQLEnum(TaskStatus), default=TaskStatus.PENDING, nullable=False, index=True)
+    status = Column(SQLEnum(TaskStatus), default=TaskStatus.PENDING, nullable=False)
     priority = Column(SQLEnum(TaskPriority), default=TaskPriority.MEDIUM, nullable=False)
     
     # Связи
@@ -45,7 +47,23 @@ class Task(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Мягкое удаление
-    is_deleted = Column(Boolean, default=False, nullable=False, index=True)
+    is_deleted = Column(Boolean, default=False, nullable=False)
+    
+    # Индексы под запросы списков: user_id [+ status], активные, по убыванию created_at
+    __table_args__ = (
+        Index(
+            "ix_tasks_user_created_active",
+            user_id, created_at.desc(), id.desc(),
+            postgresql_where=text("NOT is_deleted"),
+            sqlite_where=text("NOT is_deleted")
+        ),
+        Index(
+            "ix_tasks_user_status_created_active",
+            user_id, status, created_at.desc(), id.desc(),
+            postgresql_where=text("NOT is_deleted"),
+            sqlite_where=text("NOT is_deleted")
+        ),
+    )
     
     def __repr__(self):
         return f"<Task(id={self.id}, title='{self.title}', status='{self.status}')>"
@@ -0,0 +1,19 @@
+"""
+Модель счетчиков задач пользователя
+"""
+
+from sqlalchemy import Column, Integer, ForeignKey, Enum as SQLEnum
+from app.core.database import Base
+from app.models.task import TaskStatus
+
+
+class TaskCounter(Base):
+    """Денормализованный счетчик активных задач пользователя по статусу"""
+    __tablename__ = "task_counters"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(SQLEnum(TaskStatus), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<TaskCounter(user_id={self.user_id}, status='{self.status}', count={self.count})>"
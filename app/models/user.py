@@ -2,7 +2,7 @@
 Модель пользователя
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,7 +12,7 @@ class User(Base):
     """Модель пользователя"""
     __tablename__ = "users"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     telegram_id = Column(Integer, unique=True, nullable=False, index=True)
     username = Column(String(255), nullable=True)
     first_name = Column(String(255), nullable=True)
@@ -28,6 +28,9 @@ class User(Base):
     # Статус
     is_active = Column(Boolean, default=True, nullable=False)
     
+    # Версия задач пользователя: увеличивается при любом изменении задач (для ETag)
+    tasks_version = Column(BigInteger, default=0, server_default="0", nullable=False)
+    
     def __repr__(self):
         return f"<User(id={self.id}, telegram_id={self.telegram_id}, username='{self.username}')>"
 
@@ -3,7 +3,17 @@ from app.schemas.task import (
     TaskCreate,
     TaskUpdate,
     TaskResponse,
-    TaskListResponse
+    TaskListResponse,
+    TaskBatchCreate,
+    TaskBatchIds,
+    TaskBatchStatus,
+    TaskBatchItemResult,
+    TaskBatchResponse,
+    TaskImportRow,
+    TaskImportError,
+    TaskImportResult,
+    TaskStatsResponse,
+    TaskSort
 )
 
 __all__ = [
@@ -11,6 +21,16 @@ __all__ = [
     "TaskCreate",
     "TaskUpdate",
     "TaskResponse",
-    "TaskListResponse"
+    "TaskListResponse",
+    "TaskBatchCreate",
+    "TaskBatchIds",
+    "TaskBatchStatus",
+    "TaskBatchItemResult",
+    "TaskBatchResponse",
+    "TaskImportRow",
+    "TaskImportError",
+    "TaskImportResult",
+    "TaskStatsResponse",
+    "TaskSort"
 ]
 
@@ -5,7 +5,15 @@ Pydantic схемы для задач
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
+import enum
 from app.models.task import TaskStatus, TaskPriority
+from app.core.config import settings
+
+
+class TaskSort(str, enum.Enum):
+    """Порядок сортировки списка задач"""
+    NEWEST = "-created_at"
+    OLDEST = "created_at"
 
 
 class TaskBase(BaseModel):
@@ -44,8 +52,72 @@ class TaskResponse(TaskBase):
 class TaskListResponse(BaseModel):
     """Схема ответа со списком задач"""
     items: list[TaskResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(
+        None, description="Общее количество (в курсорном режиме только по запросу)"
+    )
+    page: Optional[int] = Field(None, description="Номер страницы (только в режиме OFFSET)")
     page_size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы")
+
+
+class TaskBatchCreate(BaseModel):
+    """Схема пакетного создания задач"""
+    items: list[TaskCreate] = Field(..., min_length=1, max_length=settings.BATCH_MAX_SIZE)
+
+
+class TaskBatchIds(BaseModel):
+    """Схема пакетной операции над задачами по ID"""
+    ids: list[int] = Field(..., min_length=1, max_length=settings.BATCH_MAX_SIZE)
+
+
+class TaskBatchStatus(TaskBatchIds):
+    """Схема пакетной смены статуса"""
+    status: TaskStatus
+
+
+class TaskBatchItemResult(BaseModel):
+    """Результат пакетной операции для одной задачи"""
+    id: Optional[int] = None
+    ok: bool
+    task: Optional[TaskResponse] = None
+    error: Optional[str] = None
 
+
+class TaskBatchResponse(BaseModel):
+    """Схема ответа пакетной операции (результаты в порядке запроса)"""
+    items: list[TaskBatchItemResult]
+
+
+class TaskImportRow(TaskBase):
+    """Строка импорта задач"""
+    telegram_id: int
+    status: TaskStatus = TaskStatus.PENDING
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class TaskImportError(BaseModel):
+    """Ошибка строки импорта"""
+    line: int
+    error: str
+
+
+class TaskImportResult(BaseModel):
+    """Отчет об импорте задач"""
+    rows: int
+    imported: int
+    failed: int
+    errors: list[TaskImportError] = Field(
+        default_factory=list, description="Первые IMPORT_MAX_ERRORS ошибок"
+    )
+    elapsed_seconds: float
+    rows_per_second: float
+
+
+class TaskStatsResponse(BaseModel):
+    """Схема ответа со статистикой задач"""
+    total: int
+    completed: int
+    pending: int
+    in_progress: int
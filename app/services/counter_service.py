@@ -0,0 +1,94 @@
+"""
+Сервис для работы со счетчиками задач
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, bindparam
+from app.core.database import dialect_insert
+from app.models.task import Task, TaskStatus
+from app.models.task_counter import TaskCounter
+from app.models.user import User
+
+# Собирается один раз: запрос выполняется на каждый список и статистику
+GET_COUNTS_STMT = select(TaskCounter.status, TaskCounter.count).where(
+    TaskCounter.user_id == bindparam("user_id")
+)
+
+
+class TaskCounterService:
+    """Сервис для работы со счетчиками задач по статусам"""
+    
+    @staticmethod
+    async def apply(
+        db: AsyncSession,
+        user_id: int,
+        deltas: dict[TaskStatus, int]
+    ) -> None:
+        """Изменить счетчики пользователя (в транзакции вызывающего кода)"""
+        await TaskCounterService.apply_many(
+            db, {(user_id, status): delta for status, delta in deltas.items()}
+        )
+    
+    @staticmethod
+    async def apply_many(
+        db: AsyncSession,
+        deltas: dict[tuple[int, TaskStatus], int]
+    ) -> None:
+        """Изменить счетчики нескольких пользователей одним запросом"""
+        rows = [
+            {"user_id": user_id, "status": status, "count": delta}
+            for (user_id, status), delta in deltas.items()
+            if delta
+        ]
+        if not rows:
+            return
+        
+        stmt = dialect_insert(db, TaskCounter).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TaskCounter.user_id, TaskCounter.status],
+            set_={"count": TaskCounter.count + stmt.excluded.count}
+        )
+        await db.execute(stmt)
+    
+    @staticmethod
+    async def get_counts(
+        db: AsyncSession,
+        user_id: int
+    ) -> dict[TaskStatus, int]:
+        """Получить счетчики пользователя по статусам"""
+        result = await db.execute(GET_COUNTS_STMT, {"user_id": user_id})
+        return {status: count for status, count in result.all()}
+    
+    @staticmethod
+    async def reconcile_user(
+        db: AsyncSession,
+        user_id: int
+    ) -> int:
+        """Пересчитать счетчики пользователя по таблице задач, вернуть число исправлений"""
+        # Блокируем строку пользователя, а не счетчиков: изменения задач берут ее (версия задач)
+        # до счетчиков и дождутся пересчета, даже если вставляют недостающую строку счетчика
+        await db.execute(select(User.id).where(User.id == user_id).with_for_update())
+        
+        result = await db.execute(
+            select(Task.status, func.count(Task.id))
+            .where(and_(Task.user_id == user_id, Task.is_deleted == False))
+            .group_by(Task.status)
+        )
+        actual = {status: count for status, count in result.all()}
+        stored = await TaskCounterService.get_counts(db, user_id)
+        
+        rows = [
+            {"user_id": user_id, "status": status, "count": actual.get(status, 0)}
+            for status in set(actual) | set(stored)
+            if actual.get(status, 0) != stored.get(status, 0)
+        ]
+        if not rows:
+            return 0
+        
+        stmt = dialect_insert(db, TaskCounter).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TaskCounter.user_id, TaskCounter.status],
+            set_={"count": stmt.excluded.count}
+        )
+        await db.execute(stmt)
+        return len(rows)
@@ -0,0 +1,243 @@
+"""
+Сервис потокового импорта задач (NDJSON/CSV)
+"""
+
+import codecs
+import csv
+import logging
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+import asyncpg
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import note_writers
+from app.core.export import ExportFormat
+from app.models.outbox import TaskEventType
+from app.models.task import Task, TaskStatus
+from app.schemas.task import TaskImportRow, TaskImportError, TaskImportResult, TaskResponse
+from app.services.counter_service import TaskCounterService
+from app.services.outbox_service import OutboxService
+from app.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+# COPY идет мимо SQLAlchemy, его ошибки - исключения asyncpg
+DATABASE_ERRORS = (SQLAlchemyError, asyncpg.PostgresError)
+
+# id для COPY берутся из последовательности заранее: COPY не возвращает строки, а id нужны событиям
+NEXT_TASK_IDS_STMT = text(
+    "SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, :count)"
+)
+
+# Колонки tasks, которые заполняет импорт (порядок записей для COPY)
+IMPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "title",
+    "description",
+    "status",
+    "priority",
+    "created_at",
+    "updated_at",
+    "completed_at",
+    "is_deleted",
+)
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Поток байтов -> строки без перевода строки"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def _ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """Записи NDJSON с номерами строк"""
+    line_no = 0
+    async for line in _lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_no, orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """Записи CSV (первая строка - заголовок) с номером первой строки записи"""
+    header = None
+    record, record_line, line_no = [], 0, 0
+    
+    async for line in _lines(chunks):
+        line_no += 1
+        if not record:
+            if not line.strip():
+                continue
+            record_line = line_no
+        record.append(line)
+        
+        # Нечетное число кавычек - поле в кавычках продолжается на следующей строке
+        text = "\n".join(record)
+        if text.count('"') % 2:
+            continue
+        record = []
+        
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield record_line, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+        else:
+            yield record_line, {name: value or None for name, value in zip(header, values)}
+    
+    if record:
+        yield record_line, ValueError("Unterminated quoted field")
+
+
+def _validation_message(error: ValidationError) -> str:
+    """Краткое описание ошибок валидации строки"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class ImportService:
+    """Сервис импорта задач"""
+    
+    @staticmethod
+    async def _insert_chunk(
+        db: AsyncSession,
+        rows: list[TaskImportRow]
+    ) -> None:
+        """Записать пачку задач, счетчики и события task.created в одной транзакции"""
+        user_ids = await UserService.resolve_user_ids(db, (row.telegram_id for row in rows))
+        now = datetime.now(timezone.utc)
+        
+        records = []
+        deltas: dict[tuple[int, TaskStatus], int] = {}
+        for row in rows:
+            user_id = user_ids[row.telegram_id]
+            created_at = row.created_at or now
+            completed_at = row.completed_at
+            if row.status == TaskStatus.COMPLETED and completed_at is None:
+                completed_at = now
+            records.append((
+                None, user_id, row.title, row.description, row.status, row.priority,
+                created_at, created_at, completed_at, False
+            ))
+            deltas[(user_id, row.status)] = deltas.get((user_id, row.status), 0) + 1
+        
+        if db.get_bind().dialect.name == "postgresql":
+            ids = (await db.execute(NEXT_TASK_IDS_STMT, {"count": len(records)})).scalars().all()
+            records = [(task_id, *record[1:]) for task_id, record in zip(ids, records)]
+            # COPY в рамках транзакции сессии; в enum-колонках PostgreSQL хранятся имена членов
+            connection = await db.connection()
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                Task.__tablename__,
+                records=[
+                    (*record[:4], record[4].name, record[5].name, *record[6:])
+                    for record in records
+                ],
+                columns=IMPORT_COLUMNS,
+            )
+        else:
+            result = await db.execute(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                [dict(zip(IMPORT_COLUMNS[1:], record[1:])) for record in records]
+            )
+            records = [(task_id, *record[1:]) for task_id, record in zip(result.scalars(), records)]
+        
+        await OutboxService.add_task_payloads(db, TaskEventType.CREATED, [
+            TaskResponse.model_validate(dict(zip(IMPORT_COLUMNS, record))).model_dump(mode="json")
+            for record in records
+        ])
+        await UserService.bump_tasks_version(db, user_ids.values())
+        await TaskCounterService.apply_many(db, deltas)
+        await db.commit()
+        # Чтения импортированных пользователей идут в основную БД, пока реплика отстает
+        note_writers(user_ids)
+    
+    @staticmethod
+    async def import_tasks(
+        db: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        format: ExportFormat = ExportFormat.NDJSON,
+        chunk_size: Optional[int] = None
+    ) -> TaskImportResult:
+        """Импортировать задачи из потока байтов пачками, не прерываясь на ошибочных строках"""
+        chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        started = time.monotonic()
+        total = imported = failed = 0
+        errors: list[TaskImportError] = []
+        
+        def fail(line: int, message: str) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < settings.IMPORT_MAX_ERRORS:
+                errors.append(TaskImportError(line=line, error=message))
+        
+        async def flush(chunk: list[tuple[int, TaskImportRow]]) -> None:
+            nonlocal imported
+            try:
+                await ImportService._insert_chunk(db, [row for _, row in chunk])
+            except DATABASE_ERRORS as e:
+                # Пачка откатывается целиком и повторяется половинами: ошибочная строка
+                # не отклоняет соседние, а сама попадает в отчет
+                await db.rollback()
+                if len(chunk) == 1:
+                    fail(chunk[0][0], f"Database error: {e.__class__.__name__}")
+                    logger.warning(f"Строка импорта {chunk[0][0]} отклонена: {e}")
+                    return
+                middle = len(chunk) // 2
+                await flush(chunk[:middle])
+                await flush(chunk[middle:])
+                return
+            imported += len(chunk)
+            elapsed = time.monotonic() - started
+            logger.info(f"Импортировано {imported} задач, {imported / elapsed:.0f} строк/с")
+        
+        records = _csv_records(chunks) if format == ExportFormat.CSV else _ndjson_records(chunks)
+        chunk: list[tuple[int, TaskImportRow]] = []
+        
+        async for line, record in records:
+            total += 1
+            if isinstance(record, Exception):
+                fail(line, str(record))
+                continue
+            try:
+                chunk.append((line, TaskImportRow.model_validate(record)))
+            except ValidationError as e:
+                fail(line, _validation_message(e))
+                continue
+            
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+        
+        if chunk:
+            await flush(chunk)
+        
+        elapsed = time.monotonic() - started
+        return TaskImportResult(
+            rows=total,
+            imported=imported,
+            failed=failed,
+            errors=errors,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(imported / elapsed, 1) if elapsed > 0 else 0.0
+        )
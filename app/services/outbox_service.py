@@ -0,0 +1,44 @@
+"""
+Сервис исходящих событий (transactional outbox)
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, Row
+from typing import Sequence
+from app.models.outbox import OutboxEvent, TaskEventType
+from app.schemas.task import TaskResponse
+
+
+class OutboxService:
+    """Сервис записи событий в outbox"""
+    
+    @staticmethod
+    async def add_task_events(
+        db: AsyncSession,
+        event_type: TaskEventType,
+        tasks: Sequence[Row]
+    ) -> None:
+        """Записать события задач в транзакции вызывающего кода (публикует workers.outbox_relay)"""
+        await OutboxService.add_task_payloads(db, event_type, [
+            TaskResponse.model_validate(task).model_dump(mode="json") for task in tasks
+        ])
+    
+    @staticmethod
+    async def add_task_payloads(
+        db: AsyncSession,
+        event_type: TaskEventType,
+        payloads: Sequence[dict]
+    ) -> None:
+        """Записать события по готовым JSON-представлениям задач (TaskResponse)"""
+        if not payloads:
+            return
+        
+        await db.execute(insert(OutboxEvent).values([
+            {
+                "event_type": event_type.value,
+                "task_id": payload["id"],
+                "user_id": payload["user_id"],
+                "payload": payload,
+            }
+            for payload in payloads
+        ]))
@@ -0,0 +1,138 @@
+"""
+Кэш готовых ответов в Redis (статистика, первая страница списка задач)
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+import orjson
+from fastapi import Response
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Пауза между проверками, пока значение считает другой процесс
+LOCK_POLL_INTERVAL = 0.02
+
+
+class ResultCache:
+    """Кэш сериализованных ответов по пользователю, версии его задач и параметрам запроса
+    
+    Версия задач пользователя увеличивается в транзакции любого изменения задач
+    (TaskService), поэтому после изменения ключ меняется и старые ответы больше не
+    читаются, а удаляются по TTL. Одновременные промахи по одному ключу (в том числе
+    внутри одного процесса) считаются один раз под блокировкой SET NX в Redis. Общую
+    задачу на процесс не заводим: compute использует сессию БД своего запроса, и
+    чужие запросы не должны зависеть от ее жизни.
+    """
+    
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int,
+        lock_ttl: float,
+        lock_wait: float,
+        enabled: bool = True
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+    
+    def key(self, user_id: int, version: int, kind: str, params: Optional[dict] = None) -> str:
+        """Ключ ответа (параметры запроса сворачиваются в короткий хэш)"""
+        digest = hashlib.sha1(
+            orjson.dumps(params or {}, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()[:16]
+        return f"{self.namespace}:{user_id}:{version}:{kind}:{digest}"
+    
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Вернуть значение из Redis или вычислить его (один раз на одновременные промахи)"""
+        redis = get_redis()
+        lock_key = f"{key}:lock"
+        
+        try:
+            value = await redis.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            locked = await redis.set(lock_key, 1, nx=True, px=int(self.lock_ttl * 1000))
+        except RedisError as e:
+            self.errors += 1
+            logger.warning(f"Redis недоступен для кэша {self.namespace}: {e}")
+            return await compute()
+        
+        if not locked:
+            # Значение уже считает другой процесс - ждем его, но не дольше lock_wait
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                try:
+                    value = await redis.get(key)
+                except RedisError:
+                    break
+                if value is not None:
+                    self.hits += 1
+                    return value
+        
+        self.misses += 1
+        value = await compute()
+        
+        try:
+            await redis.set(key, value, ex=self.ttl)
+            if locked:
+                # Блокировка могла истечь и достаться другому процессу - тогда он лишь
+                # посчитает значение повторно
+                await redis.delete(lock_key)
+        except RedisError as e:
+            self.errors += 1
+            logger.warning(f"Redis недоступен для кэша {self.namespace}: {e}")
+        return value
+    
+    async def response(
+        self,
+        key: str,
+        build: Callable[[], Awaitable[Response]],
+        headers: Optional[dict] = None
+    ) -> Response:
+        """JSON-ответ из кэша или построенный build (кэшируется тело ответа)"""
+        if not self.enabled:
+            return await build()
+        
+        async def compute() -> bytes:
+            return (await build()).body
+        
+        body = await self.get_or_compute(key, compute)
+        return Response(content=body, media_type="application/json", headers=headers)
+    
+    def clear(self) -> None:
+        """Сбросить счетчики"""
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+    
+    def stats(self) -> dict:
+        """Счетчики попаданий"""
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+result_cache = ResultCache(
+    "results",
+    ttl=settings.RESULT_CACHE_TTL,
+    lock_ttl=settings.RESULT_CACHE_LOCK_TTL,
+    lock_wait=settings.RESULT_CACHE_LOCK_WAIT,
+    enabled=settings.RESULT_CACHE_ENABLED
+)
@@ -3,14 +3,41 @@
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, Integer
-from sqlalchemy.orm import selectinload
-from typing import Optional
+from sqlalchemy import select, insert, update, func, and_, tuple_, bindparam, Integer, Row, Select
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Sequence
 from app.models.task import Task, TaskStatus
-from app.schemas.task import TaskCreate, TaskUpdate
-from app.services.user_service import UserService
+from app.models.outbox import TaskEventType
+from app.schemas.task import TaskCreate, TaskUpdate, TaskSort
+from app.services.user_service import UserService, user_id_cache
+from app.services.counter_service import TaskCounterService
+from app.services.outbox_service import OutboxService
 from datetime import datetime
 
+# Колонки, из которых строится TaskResponse
+TASK_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.priority,
+    Task.user_id,
+    Task.created_at,
+    Task.updated_at,
+    Task.completed_at,
+)
+
+# Горячие запросы собираются один раз с параметрами bindparam: SQLAlchemy не строит
+# конструкцию заново на каждый вызов, а скомпилированный SQL берет из кэша движка.
+# is_deleted = false остается литералом, чтобы подходили частичные индексы.
+GET_TASK_STMT = select(*TASK_COLUMNS).where(
+    and_(
+        Task.id == bindparam("task_id"),
+        Task.user_id == bindparam("user_id"),
+        Task.is_deleted == False
+    )
+)
+
 
 class TaskService:
     """Сервис для работы с задачами"""
@@ -23,70 +50,244 @@ class TaskService:
         username: Optional[str] = None,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None
-    ) -> Task:
+    ) -> Row:
         """Создать новую задачу"""
-        # Получаем или создаем пользователя
-        user = await UserService.get_or_create_user(
-            db, telegram_id, username, first_name, last_name
+        tasks = await TaskService.create_tasks(
+            db, [task_data], telegram_id, username, first_name, last_name
         )
-        
-        task = Task(
-            title=task_data.title,
-            description=task_data.description,
-            priority=task_data.priority,
-            user_id=user.id,  # Используем id из таблицы users
-            status=TaskStatus.PENDING
-        )
-        db.add(task)
-        await db.commit()
-        await db.refresh(task)
-        return task
+        return tasks[0]
     
     @staticmethod
     async def get_task(
         db: AsyncSession,
         task_id: int,
         user_id: int
-    ) -> Optional[Task]:
+    ) -> Optional[Row]:
         """Получить задачу по ID"""
-        result = await db.execute(
-            select(Task)
-            .where(and_(Task.id == task_id, Task.user_id == user_id, Task.is_deleted == False))
-            .options(selectinload(Task.user))
+        result = await db.execute(GET_TASK_STMT, {"task_id": task_id, "user_id": user_id})
+        return result.one_or_none()
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _list_query(
+        columns: tuple,
+        sort: TaskSort,
+        filtered: bool,
+        paging: Optional[str] = None
+    ) -> Select:
+        """Запрос списка активных задач пользователя (собирается один раз на вариант)
+        
+        Параметры: user_id; statuses при filtered; offset и limit при paging="offset";
+        after_created_at, after_id и limit при paging="after".
+        """
+        query = select(*columns).where(
+            and_(Task.user_id == bindparam("user_id"), Task.is_deleted == False)
         )
-        return result.scalar_one_or_none()
+        
+        if filtered:
+            query = query.where(Task.status.in_(bindparam("statuses", expanding=True)))
+        
+        if paging == "after":
+            position = tuple_(
+                bindparam("after_created_at", type_=Task.created_at.type),
+                bindparam("after_id", type_=Task.id.type)
+            )
+            if sort == TaskSort.OLDEST:
+                query = query.where(tuple_(Task.created_at, Task.id) > position)
+            else:
+                query = query.where(tuple_(Task.created_at, Task.id) < position)
+        
+        if sort == TaskSort.OLDEST:
+            query = query.order_by(Task.created_at.asc(), Task.id.asc())
+        else:
+            query = query.order_by(Task.created_at.desc(), Task.id.desc())
+        
+        if paging == "offset":
+            query = query.offset(bindparam("offset")).limit(bindparam("limit"))
+        elif paging == "after":
+            query = query.limit(bindparam("limit"))
+        return query
+    
+    @staticmethod
+    def _list_params(user_id: int, statuses: Optional[Sequence[TaskStatus]], **params) -> dict:
+        """Параметры запроса списка"""
+        params["user_id"] = user_id
+        if statuses:
+            params["statuses"] = list(statuses)
+        return params
     
     @staticmethod
     async def get_tasks(
         db: AsyncSession,
         user_id: int,
-        status: Optional[TaskStatus] = None,
+        statuses: Optional[Sequence[TaskStatus]] = None,
         page: int = 1,
-        page_size: int = 20
-    ) -> tuple[list[Task], int]:
-        """Получить список задач с пагинацией"""
-        query = select(Task).where(
-            and_(Task.user_id == user_id, Task.is_deleted == False)
-        )
+        page_size: int = 20,
+        sort: TaskSort = TaskSort.NEWEST,
+        columns: Sequence = TASK_COLUMNS
+    ) -> tuple[list[Row], int]:
+        """Получить список задач с пагинацией (строки с выбранными колонками)"""
+        total = await TaskService.count_tasks(db, user_id, statuses)
+        
+        # Получение задач с пагинацией
+        query = TaskService._list_query(tuple(columns), sort, bool(statuses), "offset")
+        result = await db.execute(query, TaskService._list_params(
+            user_id, statuses, offset=(page - 1) * page_size, limit=page_size
+        ))
+        tasks = result.all()
+        
+        return tasks, total
+    
+    @staticmethod
+    async def count_tasks(
+        db: AsyncSession,
+        user_id: int,
+        statuses: Optional[Sequence[TaskStatus]] = None
+    ) -> int:
+        """Количество активных задач (по счетчикам)"""
+        counts = await TaskCounterService.get_counts(db, user_id)
+        if statuses:
+            return sum(counts.get(status, 0) for status in set(statuses))
+        return sum(counts.values())
+    
+    @staticmethod
+    async def get_tasks_after(
+        db: AsyncSession,
+        user_id: int,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: int = 20,
+        sort: TaskSort = TaskSort.NEWEST,
+        columns: Sequence = TASK_COLUMNS
+    ) -> tuple[list[Row], bool]:
+        """Получить страницу задач после позиции (created_at, id) без OFFSET"""
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        params = TaskService._list_params(user_id, statuses, limit=limit + 1)
+        if after:
+            query = TaskService._list_query(tuple(columns), sort, bool(statuses), "after")
+            params["after_created_at"], params["after_id"] = after
+        else:
+            query = TaskService._list_query(tuple(columns), sort, bool(statuses), "offset")
+            params["offset"] = 0
         
-        if status:
-            query = query.where(Task.status == status)
+        result = await db.execute(query, params)
+        tasks = result.all()
         
-        # Подсчет общего количества
-        count_query = select(func.count()).select_from(
-            query.subquery()
+        return tasks[:limit], len(tasks) > limit
+    
+    @staticmethod
+    async def stream_tasks(
+        db: AsyncSession,
+        user_id: int,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Все активные задачи пользователя пачками через серверный курсор"""
+        query = TaskService._list_query(TASK_COLUMNS, TaskSort.OLDEST, bool(statuses))
+        result = await db.stream(
+            query.execution_options(yield_per=batch_size),
+            TaskService._list_params(user_id, statuses)
+        )
+        async for rows in result.partitions():
+            yield rows
+    
+    @staticmethod
+    async def create_tasks(
+        db: AsyncSession,
+        items: Sequence[TaskCreate],
+        telegram_id: int,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None
+    ) -> list[Row]:
+        """Создать несколько задач одним INSERT ... RETURNING"""
+        user_id = await UserService.upsert_user(
+            db, telegram_id, username, first_name, last_name
         )
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
         
-        # Получение задач с пагинацией
-        query = query.order_by(Task.created_at.desc())
-        query = query.offset((page - 1) * page_size).limit(page_size)
+        stmt = insert(Task).returning(*TASK_COLUMNS, sort_by_parameter_order=True)
+        result = await db.execute(stmt, [
+            {
+                "title": item.title,
+                "description": item.description,
+                "priority": item.priority,
+                "user_id": user_id,
+                "status": TaskStatus.PENDING,
+            }
+            for item in items
+        ])
+        tasks = result.all()
+        
+        # Строка пользователя блокируется до счетчиков - тот же порядок, что у сверки
+        await UserService.bump_tasks_version(db, [user_id])
+        await TaskCounterService.apply(db, user_id, {TaskStatus.PENDING: len(tasks)})
+        await OutboxService.add_task_events(db, TaskEventType.CREATED, tasks)
+        await db.commit()
+        await user_id_cache.set(telegram_id, user_id)
+        return tasks
+    
+    @staticmethod
+    async def _update_returning(
+        db: AsyncSession,
+        task_ids: Sequence[int],
+        user_id: int,
+        values: dict
+    ) -> list[tuple[Row, TaskStatus]]:
+        """Изменить активные задачи одним UPDATE ... RETURNING, вернуть строки и прежние статусы"""
+        criteria = and_(Task.id.in_(task_ids), Task.user_id == user_id, Task.is_deleted == False)
+        
+        if db.get_bind().dialect.name == "postgresql":
+            # Прежний статус (для счетчиков) читаем из заблокированных строк в том же запросе;
+            # блокируем в порядке id, чтобы параллельные пакеты не взаимоблокировались
+            previous = (
+                select(Task.id, Task.status.label("previous_status"))
+                .where(criteria)
+                .order_by(Task.id)
+                .with_for_update()
+                .cte("previous")
+            )
+            stmt = (
+                update(Task)
+                .where(Task.id == previous.c.id)
+                .values(**values)
+                .returning(*TASK_COLUMNS, previous.c.previous_status)
+                .execution_options(synchronize_session=False)
+            )
+            result = await db.execute(stmt)
+            return [(row, row.previous_status) for row in result.all()]
         
-        result = await db.execute(query.options(selectinload(Task.user)))
-        tasks = result.scalars().all()
+        # SQLite не разрешает ссылаться на другие таблицы в RETURNING
+        result = await db.execute(select(Task.id, Task.status).where(criteria))
+        previous_statuses = dict(result.all())
+        if not previous_statuses:
+            return []
         
-        return tasks, total
+        stmt = (
+            update(Task)
+            .where(criteria)
+            .values(**values)
+            .returning(*TASK_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return [(row, previous_statuses[row.id]) for row in result.all()]
+    
+    @staticmethod
+    async def _apply_status_changes(
+        db: AsyncSession,
+        user_id: int,
+        updated: list[tuple[Row, TaskStatus]],
+        deleted: bool = False
+    ) -> None:
+        """Перенести изменения статусов в счетчики"""
+        deltas: dict[TaskStatus, int] = {}
+        for task, previous_status in updated:
+            if not deleted and task.status == previous_status:
+                continue
+            deltas[previous_status] = deltas.get(previous_status, 0) - 1
+            if not deleted:
+                deltas[task.status] = deltas.get(task.status, 0) + 1
+        await TaskCounterService.apply(db, user_id, deltas)
     
     @staticmethod
     async def update_task(
@@ -94,24 +295,57 @@ class TaskService:
         task_id: int,
         user_id: int,
         task_data: TaskUpdate
-    ) -> Optional[Task]:
+    ) -> Optional[Row]:
         """Обновить задачу"""
-        task = await TaskService.get_task(db, task_id, user_id)
-        if not task:
-            return None
-        
-        update_data = task_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(task, field, value)
+        values = task_data.model_dump(exclude_unset=True)
+        if not values:
+            return await TaskService.get_task(db, task_id, user_id)
         
         # Если статус меняется на completed, устанавливаем completed_at
-        if update_data.get("status") == TaskStatus.COMPLETED and not task.completed_at:
-            task.completed_at = datetime.utcnow()
+        if values.get("status") == TaskStatus.COMPLETED:
+            values["completed_at"] = func.coalesce(Task.completed_at, func.now())
+        
+        updated = await TaskService._update_returning(db, [task_id], user_id, values)
+        if not updated:
+            return None
         
+        task, previous_status = updated[0]
+        completed = task.status == TaskStatus.COMPLETED and previous_status != TaskStatus.COMPLETED
+        
+        await UserService.bump_tasks_version(db, [user_id])
+        await TaskService._apply_status_changes(db, user_id, updated)
+        await OutboxService.add_task_events(
+            db, TaskEventType.COMPLETED if completed else TaskEventType.UPDATED, [task]
+        )
         await db.commit()
-        await db.refresh(task)
         return task
     
+    @staticmethod
+    async def update_tasks_status(
+        db: AsyncSession,
+        task_ids: Sequence[int],
+        user_id: int,
+        status: TaskStatus
+    ) -> list[Row]:
+        """Перевести несколько задач в статус одним UPDATE"""
+        values = {"status": status}
+        if status == TaskStatus.COMPLETED:
+            values["completed_at"] = func.coalesce(Task.completed_at, func.now())
+        
+        updated = await TaskService._update_returning(db, task_ids, user_id, values)
+        tasks = [task for task, _ in updated]
+        
+        if tasks:
+            await UserService.bump_tasks_version(db, [user_id])
+        await TaskService._apply_status_changes(db, user_id, updated)
+        await OutboxService.add_task_events(
+            db,
+            TaskEventType.COMPLETED if status == TaskStatus.COMPLETED else TaskEventType.UPDATED,
+            tasks
+        )
+        await db.commit()
+        return tasks
+    
     @staticmethod
     async def delete_task(
         db: AsyncSession,
@@ -119,30 +353,57 @@ class TaskService:
         user_id: int
     ) -> bool:
         """Удалить задачу (мягкое удаление)"""
-        task = await TaskService.get_task(db, task_id, user_id)
-        if not task:
-            return False
+        deleted = await TaskService.delete_tasks(db, [task_id], user_id)
+        return bool(deleted)
+    
+    @staticmethod
+    async def delete_tasks(
+        db: AsyncSession,
+        task_ids: Sequence[int],
+        user_id: int
+    ) -> list[int]:
+        """Удалить несколько задач (мягкое удаление), вернуть ID удаленных"""
+        updated = await TaskService._update_returning(
+            db, task_ids, user_id, {"is_deleted": True}
+        )
+        tasks = [task for task, _ in updated]
         
-        task.is_deleted = True
+        if tasks:
+            await UserService.bump_tasks_version(db, [user_id])
+        await TaskService._apply_status_changes(db, user_id, updated, deleted=True)
+        await OutboxService.add_task_events(db, TaskEventType.DELETED, tasks)
         await db.commit()
-        return True
+        return [task.id for task in tasks]
     
     @staticmethod
     async def complete_task(
         db: AsyncSession,
         task_id: int,
         user_id: int
-    ) -> Optional[Task]:
+    ) -> Optional[Row]:
         """Завершить задачу"""
-        task = await TaskService.get_task(db, task_id, user_id)
-        if not task:
-            return None
+        tasks = await TaskService.complete_tasks(db, [task_id], user_id)
+        return tasks[0] if tasks else None
+    
+    @staticmethod
+    async def complete_tasks(
+        db: AsyncSession,
+        task_ids: Sequence[int],
+        user_id: int
+    ) -> list[Row]:
+        """Завершить несколько задач одним UPDATE"""
+        updated = await TaskService._update_returning(
+            db, task_ids, user_id,
+            {"status": TaskStatus.COMPLETED, "completed_at": func.now()}
+        )
+        tasks = [task for task, _ in updated]
         
-        task.status = TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
+        if tasks:
+            await UserService.bump_tasks_version(db, [user_id])
+        await TaskService._apply_status_changes(db, user_id, updated)
+        await OutboxService.add_task_events(db, TaskEventType.COMPLETED, tasks)
         await db.commit()
-        await db.refresh(task)
-        return task
+        return tasks
     
     @staticmethod
     async def get_statistics(
@@ -150,59 +411,11 @@ class TaskService:
         user_id: int
     ) -> dict:
         """Получить статистику по задачам"""
-        # Подсчет по статусам
-        base_query = select(Task).where(
-            and_(Task.user_id == user_id, Task.is_deleted == False)
-        )
-        
-        # Общее количество
-        total_result = await db.execute(
-            select(func.count(Task.id)).where(
-                and_(Task.user_id == user_id, Task.is_deleted == False)
-            )
-        )
-        total = total_result.scalar() or 0
-        
-        # Выполненные
-        completed_result = await db.execute(
-            select(func.count(Task.id)).where(
-                and_(
-                    Task.user_id == user_id,
-                    Task.status == TaskStatus.COMPLETED,
-                    Task.is_deleted == False
-                )
-            )
-        )
-        completed = completed_result.scalar() or 0
-        
-        # В ожидании
-        pending_result = await db.execute(
-            select(func.count(Task.id)).where(
-                and_(
-                    Task.user_id == user_id,
-                    Task.status == TaskStatus.PENDING,
-                    Task.is_deleted == False
-                )
-            )
-        )
-        pending = pending_result.scalar() or 0
-        
-        # В работе
-        in_progress_result = await db.execute(
-            select(func.count(Task.id)).where(
-                and_(
-                    Task.user_id == user_id,
-                    Task.status == TaskStatus.IN_PROGRESS,
-                    Task.is_deleted == False
-                )
-            )
-        )
-        in_progress = in_progress_result.scalar() or 0
+        counts = await TaskCounterService.get_counts(db, user_id)
         
         return {
-            "total": total,
-            "completed": completed,
-            "pending": pending,
-            "in_progress": in_progress
+            "total": sum(counts.values()),
+            "completed": counts.get(TaskStatus.COMPLETED, 0),
+            "pending": counts.get(TaskStatus.PENDING, 0),
+            "in_progress": counts.get(TaskStatus.IN_PROGRESS, 0)
         }
-
@@ -3,61 +3,146 @@
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func, and_, or_
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+from app.core.database import dialect_insert
 from app.models.user import User
-from typing import Optional
+from typing import Iterable, Optional
+
+# Кэш соответствия telegram_id -> users.id (пользователи не удаляются и не меняют telegram_id)
+user_id_cache = TwoTierCache(
+    "user_id",
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+    use_redis=settings.USER_CACHE_REDIS
+)
 
 
 class UserService:
     """Сервис для работы с пользователями"""
     
     @staticmethod
-    async def get_or_create_user(
+    async def upsert_user(
         db: AsyncSession,
         telegram_id: int,
         username: Optional[str] = None,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None
-    ) -> User:
-        """Получить или создать пользователя"""
-        # Ищем пользователя по telegram_id
+    ) -> int:
+        """Создать пользователя или обновить изменившиеся поля одним запросом, вернуть users.id
+        
+        Не делает commit: запись идет в транзакции вызывающего кода. Кэш telegram_id -> users.id
+        заполняет вызывающий код после commit (при откате id нового пользователя недействителен).
+        """
+        # Пустые значения не затирают сохраненные данные
+        profile = {
+            "username": username or None,
+            "first_name": first_name or None,
+            "last_name": last_name or None,
+        }
+        
+        stmt = dialect_insert(db, User).values(telegram_id=telegram_id, **profile)
+        columns = User.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={
+                **{field: func.coalesce(stmt.excluded[field], columns[field]) for field in profile},
+                "updated_at": func.now(),
+            },
+            # Обновляем строку только если какое-то поле действительно изменилось
+            where=or_(*(
+                and_(
+                    stmt.excluded[field].isnot(None),
+                    stmt.excluded[field].is_distinct_from(columns[field])
+                )
+                for field in profile
+            ))
+        ).returning(User.id)
+        
+        result = await db.execute(stmt)
+        user_id = result.scalar_one_or_none()
+        if user_id is None:
+            # Пользователь существует и не изменился - RETURNING пуст
+            return await UserService.get_user_id(db, telegram_id)
+        return user_id
+    
+    @staticmethod
+    async def get_user_id(
+        db: AsyncSession,
+        telegram_id: int
+    ) -> Optional[int]:
+        """Получить users.id по telegram_id (через кэш)"""
+        user_id = await user_id_cache.get(telegram_id)
+        if user_id is not None:
+            return user_id
+        
         result = await db.execute(
-            select(User).where(User.telegram_id == telegram_id)
+            select(User.id).where(User.telegram_id == telegram_id)
         )
-        user = result.scalar_one_or_none()
-        
-        if user:
-            # Обновляем данные, если они изменились
-            if username and user.username != username:
-                user.username = username
-            if first_name and user.first_name != first_name:
-                user.first_name = first_name
-            if last_name and user.last_name != last_name:
-                user.last_name = last_name
-            await db.commit()
-            await db.refresh(user)
-            return user
-        
-        # Создаем нового пользователя
-        user = User(
-            telegram_id=telegram_id,
-            username=username,
-            first_name=first_name,
-            last_name=last_name
+        user_id = result.scalar_one_or_none()
+        if user_id is not None:
+            await user_id_cache.set(telegram_id, user_id)
+        return user_id
+    
+    @staticmethod
+    async def resolve_user_ids(
+        db: AsyncSession,
+        telegram_ids: Iterable[int]
+    ) -> dict[int, int]:
+        """Получить users.id для набора telegram_id, создав недостающих (без commit)"""
+        telegram_ids = list(set(telegram_ids))
+        if not telegram_ids:
+            return {}
+        
+        stmt = dialect_insert(db, User).values([
+            {"telegram_id": telegram_id} for telegram_id in telegram_ids
+        ]).on_conflict_do_nothing(index_elements=[User.telegram_id])
+        await db.execute(stmt)
+        
+        result = await db.execute(
+            select(User.telegram_id, User.id).where(User.telegram_id.in_(telegram_ids))
         )
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        return user
+        return dict(result.all())
     
     @staticmethod
-    async def get_user_by_telegram_id(
+    async def get_user_version(
         db: AsyncSession,
         telegram_id: int
-    ) -> Optional[User]:
-        """Получить пользователя по telegram_id"""
+    ) -> Optional[tuple[int, int]]:
+        """Получить (users.id, версия задач) по telegram_id одним запросом
+        
+        Версия не кэшируется: от нее зависят ETag и кэш ответов, а значение из кэша процесса
+        могло бы пережить commit изменения и скрыть его от клиента. Столбец читается тем же
+        запросом по индексу telegram_id, что и users.id.
+        """
         result = await db.execute(
-            select(User).where(User.telegram_id == telegram_id)
+            select(User.id, User.tasks_version).where(User.telegram_id == telegram_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        await user_id_cache.set(telegram_id, row.id)
+        return row.id, row.tasks_version
+    
+    @staticmethod
+    async def bump_tasks_version(
+        db: AsyncSession,
+        user_ids: Iterable[int]
+    ) -> None:
+        """Увеличить версию задач пользователей (в транзакции вызывающего кода)
+        
+        Блокирует строки пользователей до конца транзакции, поэтому вызывается до изменения
+        счетчиков: сверка счетчиков блокирует строку пользователя первой.
+        """
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return
+        
+        await db.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            # updated_at пользователя относится к профилю, а не к задачам
+            .values(tasks_version=User.tasks_version + 1, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
         )
-        return result.scalar_one_or_none()
-
@@ -0,0 +1,132 @@
+"""
+Бенчмарк сериализации списка задач: штатный путь FastAPI против FastJSONResponse
+
+Запуск: python -m benchmarks.bench_json_responses [--page-size 100] [--iterations 500]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.responses import JSONResponse
+from app.core.config import settings
+from app.core.database import Base, get_db, get_read_db
+from app.core.rate_limit import rate_limiter
+from app.core.responses import FastJSONResponse
+from app.main import app
+from app.models.task import TaskStatus, TaskPriority
+from app.schemas.task import TaskResponse, TaskListResponse
+from benchmarks.bench_task_listing import seed_tasks
+
+
+def build_payload(page_size: int) -> TaskListResponse:
+    """Страница задач для сериализации"""
+    now = datetime.now(timezone.utc)
+    items = [
+        TaskResponse(
+            id=i,
+            title=f"Задача {i}",
+            description="Описание " * 10,
+            priority=TaskPriority.MEDIUM,
+            status=TaskStatus.PENDING,
+            user_id=1,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(page_size)
+    ]
+    return TaskListResponse(items=items, total=1000, page=1, page_size=page_size, pages=10)
+
+
+def summarize(timings: list[float]) -> str:
+    timings = sorted(timings)
+    return (
+        f"mean {statistics.mean(timings) * 1e6:.0f} us, "
+        f"p50 {timings[len(timings) // 2] * 1e6:.0f} us, "
+        f"p99 {timings[int(len(timings) * 0.99) - 1] * 1e6:.0f} us"
+    )
+
+
+async def bench_serialization(page_size: int, iterations: int) -> None:
+    """Только сериализация уже готовой модели"""
+    payload = build_payload(page_size)
+    field = create_response_field(name="response", type_=TaskListResponse)
+    
+    async def default_path() -> bytes:
+        content = await serialize_response(field=field, response_content=payload)
+        return JSONResponse(content).body
+    
+    async def fast_path() -> bytes:
+        return FastJSONResponse(payload).body
+    
+    for name, func in (("fastapi default", default_path), ("FastJSONResponse", fast_path)):
+        for _ in range(50):
+            await func()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await func()
+            timings.append(time.perf_counter() - start)
+        print(f"  serialize  {name:>16}: {summarize(timings)}")
+
+
+async def bench_endpoint(page_size: int, iterations: int) -> None:
+    """GET /api/tasks целиком через ASGI (SQLite в памяти)"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed_tasks(session_factory, page_size * 10)
+    
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+    
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # Сотни запросов одного telegram_id упрутся в лимит частоты
+    app.dependency_overrides[rate_limiter] = lambda: None
+    params = {"telegram_id": 1, "page_size": page_size}
+    try:
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            for fast_json in (False, True):
+                settings.FAST_JSON = fast_json
+                for _ in range(50):
+                    await client.get("/api/tasks", params=params)
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    response = await client.get("/api/tasks", params=params)
+                    timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200
+                name = "FAST_JSON=True" if fast_json else "FAST_JSON=False"
+                print(f"  endpoint   {name:>16}: {summarize(timings)}")
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+async def main():
+    """Главная функция бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк JSON-ответов")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    
+    print(f"page_size={args.page_size}, iterations={args.iterations}")
+    await bench_serialization(args.page_size, args.iterations)
+    await bench_endpoint(args.page_size, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Бенчмарк накладных расходов на построение запросов:
+select() на каждый вызов против собранных заранее
+
+Запуск: python -m benchmarks.bench_statements [--tasks 1000] [--page-size 20] [--iterations 2000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.task import Task, TaskStatus
+from app.models.task_counter import TaskCounter
+from app.schemas.task import TaskSort
+from app.services.counter_service import GET_COUNTS_STMT
+from app.services.task_service import GET_TASK_STMT, TASK_COLUMNS, TaskService
+from benchmarks.bench_task_listing import seed_tasks
+
+STATUSES = [TaskStatus.PENDING, TaskStatus.IN_PROGRESS]
+
+
+def inline_statements(user_id: int, page_size: int) -> dict:
+    """Прежний путь: конструкция собирается заново на каждый вызов, значения - литералы запроса"""
+    return {
+        "get_task": lambda task_id: (
+            select(*TASK_COLUMNS)
+            .where(and_(Task.id == task_id, Task.user_id == user_id, Task.is_deleted == False)),
+            None
+        ),
+        "list_page": lambda task_id: (
+            select(*TASK_COLUMNS)
+            .where(and_(Task.user_id == user_id, Task.is_deleted == False))
+            .where(Task.status.in_(STATUSES))
+            .order_by(Task.created_at.desc(), Task.id.desc())
+            .offset(0)
+            .limit(page_size),
+            None
+        ),
+        "counts": lambda task_id: (
+            select(TaskCounter.status, TaskCounter.count).where(TaskCounter.user_id == user_id),
+            None
+        ),
+    }
+
+
+def prebuilt_statements(user_id: int, page_size: int) -> dict:
+    """Текущий путь: собранные заранее конструкции и параметры"""
+    return {
+        "get_task": lambda task_id: (GET_TASK_STMT, {"task_id": task_id, "user_id": user_id}),
+        "list_page": lambda task_id: (
+            TaskService._list_query(TASK_COLUMNS, TaskSort.NEWEST, True, "offset"),
+            TaskService._list_params(user_id, STATUSES, offset=0, limit=page_size)
+        ),
+        "counts": lambda task_id: (GET_COUNTS_STMT, {"user_id": user_id}),
+    }
+
+
+def summarize(timings: list[float]) -> str:
+    timings = sorted(timings)
+    return (
+        f"mean {statistics.mean(timings) * 1e6:.1f} us, "
+        f"p50 {timings[len(timings) // 2] * 1e6:.1f} us, "
+        f"p99 {timings[int(len(timings) * 0.99) - 1] * 1e6:.1f} us"
+    )
+
+
+def bench_build(user_id: int, page_size: int, iterations: int) -> None:
+    """Только Python: построение конструкции и ключа кэша компиляции (при каждом execute)"""
+    for name, factory in (("inline", inline_statements), ("prebuilt", prebuilt_statements)):
+        for query, build in factory(user_id, page_size).items():
+            timings = []
+            for i in range(iterations):
+                start = time.perf_counter()
+                stmt, _ = build(i)
+                stmt._generate_cache_key()
+                timings.append(time.perf_counter() - start)
+            print(f"  build    {name:>8} {query:>9}: {summarize(timings)}")
+
+
+async def bench_execute(
+    session_factory,
+    user_id: int,
+    task_id: int,
+    page_size: int,
+    iterations: int
+) -> None:
+    """Выполнение запроса целиком (SQLite в памяти, одна сессия)"""
+    async with session_factory() as db:
+        for name, factory in (("inline", inline_statements), ("prebuilt", prebuilt_statements)):
+            for query, build in factory(user_id, page_size).items():
+                for _ in range(50):
+                    stmt, params = build(task_id)
+                    (await db.execute(stmt, params)).all()
+                
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    stmt, params = build(task_id)
+                    (await db.execute(stmt, params)).all()
+                    timings.append(time.perf_counter() - start)
+                print(f"  execute  {name:>8} {query:>9}: {summarize(timings)}")
+
+
+async def main():
+    """Главная функция бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк построения запросов")
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    user_id = await seed_tasks(session_factory, args.tasks)
+    
+    print(f"tasks={args.tasks}, page_size={args.page_size}, iterations={args.iterations}")
+    bench_build(user_id, args.page_size, args.iterations)
+    await bench_execute(session_factory, user_id, 1, args.page_size, args.iterations)
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""
+Бенчмарк чтения страницы задач: ORM-объекты против строк Core
+
+Запуск: python -m benchmarks.bench_task_listing [--tasks 1000] [--page-size 100] [--iterations 300]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.user import User
+from app.schemas.task import TaskResponse, TaskListResponse
+from app.services.counter_service import TaskCounterService
+from app.services.task_service import TaskService
+
+
+async def legacy_page(db: AsyncSession, user_id: int, page_size: int) -> bytes:
+    """Прежний путь: ORM + selectinload, model_validate в роутере, повторная обработка FastAPI"""
+    query = (
+        select(Task)
+        .where(and_(Task.user_id == user_id, Task.is_deleted == False))
+        .order_by(Task.created_at.desc(), Task.id.desc())
+        .limit(page_size)
+        .options(selectinload(Task.user))
+    )
+    tasks = (await db.execute(query)).scalars().all()
+    total = await TaskService.count_tasks(db, user_id)
+    
+    payload = TaskListResponse(
+        items=[TaskResponse.model_validate(task) for task in tasks],
+        total=total,
+        page=1,
+        page_size=page_size,
+        pages=(total + page_size - 1) // page_size
+    )
+    # FastAPI: dump -> валидация через response_model -> jsonable_encoder -> json
+    validated = TaskListResponse.model_validate(payload.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+async def core_page(db: AsyncSession, user_id: int, page_size: int) -> bytes:
+    """Текущий путь: строки Core, одна валидация и одна сериализация"""
+    tasks, total = await TaskService.get_tasks(db, user_id, None, 1, page_size)
+    payload = TaskListResponse(
+        items=tasks,
+        total=total,
+        page=1,
+        page_size=page_size,
+        pages=(total + page_size - 1) // page_size
+    )
+    return payload.model_dump_json().encode()
+
+
+async def seed_tasks(session_factory, count: int, telegram_id: int = 1) -> int:
+    """Создать пользователя с count задачами, вернуть users.id"""
+    async with session_factory() as db:
+        user = User(telegram_id=telegram_id, username="bench")
+        db.add(user)
+        await db.flush()
+        db.add_all([
+            Task(
+                title=f"Задача {i}",
+                description="Описание " * 10,
+                user_id=user.id,
+                status=TaskStatus.PENDING,
+                priority=TaskPriority.MEDIUM
+            )
+            for i in range(count)
+        ])
+        await TaskCounterService.apply(db, user.id, {TaskStatus.PENDING: count})
+        await db.commit()
+        return user.id
+
+
+async def measure(session_factory, func, user_id: int, page_size: int, iterations: int) -> dict:
+    """Время и аллокации на один запрос (новая сессия на каждый запрос)"""
+    for _ in range(20):
+        async with session_factory() as db:
+            await func(db, user_id, page_size)
+    
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        async with session_factory() as db:
+            await func(db, user_id, page_size)
+        timings.append(time.perf_counter() - start)
+    
+    tracemalloc.start()
+    allocated = []
+    for _ in range(min(iterations, 50)):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        async with session_factory() as db:
+            await func(db, user_id, page_size)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated.append(peak - before)
+    tracemalloc.stop()
+    
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p99_ms": timings[int(len(timings) * 0.99) - 1] * 1000,
+        "peak_kib": statistics.mean(allocated) / 1024,
+    }
+
+
+async def main():
+    """Главная функция бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк списка задач")
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    args = parser.parse_args()
+    
+    kwargs = {"poolclass": StaticPool} if args.database_url.startswith("sqlite") else {}
+    engine = create_async_engine(args.database_url, **kwargs)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    user_id = await seed_tasks(session_factory, args.tasks)
+    
+    print(f"page_size={args.page_size}, tasks={args.tasks}, iterations={args.iterations}")
+    for name, func in (("orm+selectinload", legacy_page), ("core rows", core_page)):
+        result = await measure(session_factory, func, user_id, args.page_size, args.iterations)
+        print(
+            f"{name:>18}: mean {result['mean_ms']:.2f} ms, p50 {result['p50_ms']:.2f} ms, "
+            f"p99 {result['p99_ms']:.2f} ms, peak alloc {result['peak_kib']:.0f} KiB"
+        )
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,5 @@
+"""
+Нагрузочный тест API: наполнение БД, сценарии трафика бота, драйвер нагрузки и отчет
+
+Запуск: python -m benchmarks.load [--mode closed|open] [--duration 30] [--json report.json]
+"""
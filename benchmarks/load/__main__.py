@@ -0,0 +1,128 @@
+"""
+Запуск нагрузочного теста
+
+In-process (по умолчанию): приложение вызывается через ASGI, БД наполняется перед прогоном.
+Внешний сервер: --url http://host:8000, БД заранее наполнена через benchmarks.load.seed
+с тем же --users. Лимиты частоты на сервере должны быть подняты (RATE_LIMIT_PER_MINUTE,
+RATE_LIMIT_READ_PER_MINUTE), иначе нагрузку от --users пользователей режет лимитер:
+ответы 429 считаются отдельной колонкой отчета, а не ошибками и не в задержках.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from typing import Optional
+from httpx import AsyncClient, Limits
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from benchmarks.load.driver import make_users, run_closed, run_open
+from benchmarks.load.report import build_report, format_report
+from benchmarks.load.scenarios import Scenario
+from benchmarks.load.seed import TELEGRAM_ID_BASE, make_engine, seed_dataset
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Подготовить цель, прогнать нагрузку, собрать отчет"""
+    telegram_ids = [TELEGRAM_ID_BASE + i for i in range(args.users)]
+    engine = None
+    tmpdir: Optional[tempfile.TemporaryDirectory] = None
+    
+    if args.url:
+        client = AsyncClient(
+            base_url=args.url,
+            timeout=30.0,
+            limits=Limits(max_connections=max(args.concurrency, args.max_outstanding))
+        )
+    else:
+        from app.core.database import get_db, get_read_db
+        from app.core.rate_limit import rate_limiter
+        from app.main import app
+        
+        database_url = args.database_url
+        if database_url is None:
+            # Файл, а не :memory: - у каждой сессии свое соединение, как в проде
+            tmpdir = tempfile.TemporaryDirectory()
+            database_url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'load.db')}"
+        engine = make_engine(database_url)
+        telegram_ids = await seed_dataset(engine, args.users, args.tasks, args.seed)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+        
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        # Нагрузка от небольшого числа пользователей упрется в лимит частоты
+        app.dependency_overrides[rate_limiter] = lambda: None
+        client = AsyncClient(app=app, base_url="http://load")
+    
+    users = make_users(telegram_ids, args.seed)
+    scenario = Scenario()
+    try:
+        async with client:
+            if args.mode == "closed":
+                recorder, elapsed = await run_closed(
+                    client, scenario, users, args.concurrency, args.duration, args.think_time
+                )
+            else:
+                recorder, elapsed = await run_open(
+                    client, scenario, users,
+                    args.rate, args.duration, args.max_outstanding, args.seed
+                )
+    finally:
+        if engine is not None:
+            app.dependency_overrides.clear()
+            await engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    
+    config = {
+        "target": args.url or (args.database_url or "sqlite-file"),
+        "mode": args.mode,
+        "users": args.users,
+        "tasks": args.tasks,
+        "duration": args.duration,
+    }
+    if args.mode == "closed":
+        config.update(concurrency=args.concurrency, think_time=args.think_time)
+    else:
+        config.update(rate=args.rate, max_outstanding=args.max_outstanding)
+    return build_report(recorder, elapsed, config)
+
+
+def main():
+    """Главная функция нагрузочного теста"""
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность, сек")
+    parser.add_argument("--users", type=int, default=100, help="Пользователей бота")
+    parser.add_argument("--tasks", type=int, default=50, help="Задач на пользователя")
+    parser.add_argument("--concurrency", type=int, default=20, help="Клиентов (closed)")
+    parser.add_argument(
+        "--think-time", type=float, default=0.0, help="Средняя пауза клиента, сек (closed)"
+    )
+    parser.add_argument("--rate", type=float, default=200.0, help="Запросов в секунду (open)")
+    parser.add_argument(
+        "--max-outstanding", type=int, default=500, help="Незавершенных запросов (open)"
+    )
+    parser.add_argument("--url", help="Внешний сервер вместо приложения в процессе")
+    parser.add_argument(
+        "--database-url", help="БД для приложения в процессе (по умолчанию временный SQLite)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--json", help="Сохранить отчет в JSON (для python -m benchmarks.load.report)"
+    )
+    args = parser.parse_args()
+    
+    report = asyncio.run(run(args))
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Драйвер нагрузки: замкнутая (closed-loop) и открытая (open-loop) модели
+"""
+
+import asyncio
+import random
+import time
+from httpx import AsyncClient
+from benchmarks.load.report import Recorder
+from benchmarks.load.scenarios import Scenario, VirtualUser
+
+
+def make_users(telegram_ids: list[int], seed: int) -> list[VirtualUser]:
+    """Виртуальные пользователи с собственными генераторами случайных чисел"""
+    return [
+        VirtualUser(telegram_id=telegram_id, rng=random.Random(seed + i))
+        for i, telegram_id in enumerate(telegram_ids)
+    ]
+
+
+async def run_action(
+    client: AsyncClient,
+    scenario: Scenario,
+    user: VirtualUser,
+    recorder: Recorder,
+    started_at: float
+) -> None:
+    """Выполнить одно действие пользователя и записать задержку от started_at"""
+    action = scenario.next_action(user)
+    try:
+        endpoint, response = await action(client, user)
+        status = response.status_code
+    except Exception:
+        endpoint, status = action.__name__, None
+    recorder.record(endpoint, time.perf_counter() - started_at, status)
+
+
+async def run_closed(
+    client: AsyncClient,
+    scenario: Scenario,
+    users: list[VirtualUser],
+    concurrency: int,
+    duration: float,
+    think_time: float = 0.0
+) -> tuple[Recorder, float]:
+    """Замкнутая модель: concurrency клиентов, каждый шлет следующий запрос после ответа"""
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + duration
+    
+    async def loop(worker: int) -> None:
+        # Клиенты делят пользователей поровну, как сессии бота
+        own = users[worker::concurrency] or [users[worker % len(users)]]
+        i = 0
+        while time.perf_counter() < deadline:
+            user = own[i % len(own)]
+            i += 1
+            await run_action(client, scenario, user, recorder, time.perf_counter())
+            if think_time:
+                await asyncio.sleep(user.rng.expovariate(1 / think_time))
+    
+    await asyncio.gather(*(loop(worker) for worker in range(concurrency)))
+    return recorder, time.perf_counter() - start
+
+
+async def run_open(
+    client: AsyncClient,
+    scenario: Scenario,
+    users: list[VirtualUser],
+    rate: float,
+    duration: float,
+    max_outstanding: int,
+    seed: int = 42
+) -> tuple[Recorder, float]:
+    """Открытая модель: пуассоновский поток rate запросов/сек независимо от ответов
+    
+    Задержка считается от запланированного момента отправки, поэтому очередь
+    на стороне клиента не прячет деградацию сервера. Запросы сверх
+    max_outstanding не отправляются и учитываются как dropped.
+    """
+    recorder = Recorder()
+    rng = random.Random(seed)
+    pending: set[asyncio.Task] = set()
+    start = time.perf_counter()
+    deadline = start + duration
+    scheduled = start
+    
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        
+        if len(pending) >= max_outstanding:
+            recorder.dropped += 1
+            continue
+        user = rng.choice(users)
+        task = asyncio.create_task(run_action(client, scenario, user, recorder, scheduled))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    
+    if pending:
+        await asyncio.gather(*pending)
+    return recorder, time.perf_counter() - start
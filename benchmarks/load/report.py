@@ -0,0 +1,158 @@
+"""
+Отчет нагрузочного теста: RPS и перцентили задержки по endpoint, сравнение прогонов
+
+Сравнение: python -m benchmarks.load.report base.json new.json
+"""
+
+import argparse
+import json
+import math
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class Recorder:
+    """Сбор задержек, ошибок и отказов лимита частоты по endpoint"""
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    rate_limited: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    dropped: int = 0
+    
+    def record(self, endpoint: str, latency: float, status: Optional[int]) -> None:
+        """status None - запрос не дошел до ответа (исключение клиента)"""
+        if status == 429:
+            # Отказ лимитера быстрее обработки и исказил бы перцентили, считаем отдельно
+            self.rate_limited[endpoint] += 1
+            return
+        self.latencies[endpoint].append(latency)
+        if status is None or status >= 400:
+            self.errors[endpoint] += 1
+
+
+def git_revision() -> Optional[str]:
+    """Текущий коммит (для сравнения отчетов между коммитами)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(recorder: Recorder, elapsed: float, config: dict) -> dict:
+    """Отчет в виде словаря (сохраняется в JSON)"""
+    endpoints = {}
+    all_latencies = []
+    for endpoint in sorted(set(recorder.latencies) | set(recorder.rate_limited)):
+        latencies = sorted(recorder.latencies.get(endpoint, []))
+        all_latencies.extend(latencies)
+        endpoints[endpoint] = summarize(
+            latencies, recorder.errors[endpoint], recorder.rate_limited[endpoint], elapsed
+        )
+    
+    return {
+        "revision": git_revision(),
+        "config": config,
+        "elapsed_s": round(elapsed, 3),
+        "dropped": recorder.dropped,
+        "total": summarize(
+            sorted(all_latencies),
+            sum(recorder.errors.values()),
+            sum(recorder.rate_limited.values()),
+            elapsed
+        ),
+        "endpoints": endpoints,
+    }
+
+
+def summarize(latencies: list[float], errors: int, rate_limited: int, elapsed: float) -> dict:
+    """Метрики одного endpoint (задержки в миллисекундах, без отказов 429)"""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rate_limited": rate_limited,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def format_report(report: dict) -> str:
+    """Таблица отчета для консоли"""
+    lines = [
+        f"revision={report['revision']} elapsed={report['elapsed_s']}s dropped={report['dropped']} "
+        + " ".join(f"{key}={value}" for key, value in report["config"].items()),
+        f"{'endpoint':<32}{'requests':>9}{'errors':>8}{'429':>7}"
+        f"{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+    ]
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for endpoint, m in rows:
+        lines.append(
+            f"{endpoint:<32}{m['requests']:>9}{m['errors']:>8}{m['rate_limited']:>7}"
+            f"{m['rps']:>9.1f}{m['p50_ms']:>9.2f}{m['p95_ms']:>9.2f}{m['p99_ms']:>9.2f}"
+        )
+    if report["total"]["rate_limited"]:
+        lines.append(
+            "⚠️ сервер отвечал 429: для нагрузки на внешний сервер поднимите "
+            "RATE_LIMIT_PER_MINUTE и RATE_LIMIT_READ_PER_MINUTE"
+        )
+    return "\n".join(lines)
+
+
+def compare_reports(base: dict, new: dict) -> str:
+    """Изменение RPS и p99 по endpoint между двумя отчетами"""
+    lines = [
+        f"{base['revision']} -> {new['revision']}",
+        f"{'endpoint':<32}{'rps':>18}{'p99 ms':>22}",
+    ]
+    if base["config"] != new["config"]:
+        lines.insert(1, "⚠️ параметры прогонов различаются, сравнение может быть некорректным")
+    
+    rows = [("TOTAL", base["total"], new["total"])] + [
+        (endpoint, base["endpoints"][endpoint], new["endpoints"][endpoint])
+        for endpoint in new["endpoints"] if endpoint in base["endpoints"]
+    ]
+    for endpoint, b, n in rows:
+        lines.append(
+            f"{endpoint:<32}{b['rps']:>8.1f} -> {n['rps']:<7.1f}"
+            f"{b['p99_ms']:>10.2f} -> {n['p99_ms']:<8.2f}({_delta(b['p99_ms'], n['p99_ms'])})"
+        )
+    return "\n".join(lines)
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    """Сравнение двух сохраненных отчетов"""
+    parser = argparse.ArgumentParser(description="Сравнение отчетов нагрузочного теста")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args()
+    
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(compare_reports(base, new))
+
+
+if __name__ == "__main__":
+    main()
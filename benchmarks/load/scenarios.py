@@ -0,0 +1,93 @@
+"""
+Сценарии нагрузки, повторяющие трафик бота
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+from httpx import AsyncClient, Response
+
+
+@dataclass
+class VirtualUser:
+    """Состояние пользователя бота в нагрузочном тесте"""
+    telegram_id: int
+    rng: random.Random
+    pending_ids: list[int] = field(default_factory=list)
+
+
+# Действие: запрос(ы) от имени пользователя -> (имя endpoint для отчета, ответ)
+Action = Callable[[AsyncClient, VirtualUser], Awaitable[tuple[str, Response]]]
+
+
+async def list_tasks(client: AsyncClient, user: VirtualUser) -> tuple[str, Response]:
+    """/tasks: первая страница списка"""
+    response = await client.get("/api/tasks", params={"telegram_id": user.telegram_id})
+    return "GET /api/tasks", response
+
+
+async def list_pending(client: AsyncClient, user: VirtualUser) -> tuple[str, Response]:
+    """/complete без ID: незавершенные задачи с проекцией полей"""
+    params = [
+        ("telegram_id", user.telegram_id),
+        ("status", "pending"),
+        ("status", "in_progress"),
+        ("fields", "id,title,status"),
+        ("page_size", 10),
+    ]
+    response = await client.get("/api/tasks", params=params)
+    if response.status_code == 200:
+        user.pending_ids = [item["id"] for item in response.json()["items"]]
+    return "GET /api/tasks?status", response
+
+
+async def create_task(client: AsyncClient, user: VirtualUser) -> tuple[str, Response]:
+    """/add: создание задачи"""
+    response = await client.post(
+        "/api/tasks",
+        params={"telegram_id": user.telegram_id, "username": f"load{user.telegram_id}"},
+        json={"title": f"Нагрузка {user.rng.randint(0, 10**6)}", "priority": "medium"}
+    )
+    if response.status_code == 201:
+        user.pending_ids.append(response.json()["id"])
+    return "POST /api/tasks", response
+
+
+async def complete_task(client: AsyncClient, user: VirtualUser) -> tuple[str, Response]:
+    """/complete <ID>: завершение известной незавершенной задачи"""
+    if not user.pending_ids:
+        return await list_pending(client, user)
+    task_id = user.pending_ids.pop(user.rng.randrange(len(user.pending_ids)))
+    response = await client.post(
+        f"/api/tasks/{task_id}/complete",
+        params={"telegram_id": user.telegram_id}
+    )
+    return "POST /api/tasks/{id}/complete", response
+
+
+async def get_stats(client: AsyncClient, user: VirtualUser) -> tuple[str, Response]:
+    """/stats: статистика"""
+    response = await client.get("/api/stats", params={"telegram_id": user.telegram_id})
+    return "GET /api/stats", response
+
+
+# Доли действий в трафике бота
+BOT_MIX: dict[Action, float] = {
+    list_tasks: 0.35,
+    list_pending: 0.15,
+    create_task: 0.15,
+    complete_task: 0.10,
+    get_stats: 0.25,
+}
+
+
+class Scenario:
+    """Случайный выбор действий по весам (воспроизводимый при одинаковом seed)"""
+    
+    def __init__(self, mix: Optional[dict[Action, float]] = None):
+        self.mix = mix or BOT_MIX
+        self._actions = list(self.mix)
+        self._weights = list(self.mix.values())
+    
+    def next_action(self, user: VirtualUser) -> Action:
+        return user.rng.choices(self._actions, self._weights)[0]
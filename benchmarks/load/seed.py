@@ -0,0 +1,140 @@
+"""
+Наполнение БД для нагрузочного теста: N пользователей по M задач
+
+Запуск: python -m benchmarks.load.seed --database-url postgresql+asyncpg://...
+    [--users 100] [--tasks 50]
+"""
+
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+)
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.task_counter import TaskCounter
+from app.models.user import User
+
+# Первый telegram_id пользователей нагрузочного теста
+TELEGRAM_ID_BASE = 1_000_000
+
+# Доли статусов, близкие к реальным данным бота
+STATUS_WEIGHTS = {
+    TaskStatus.PENDING: 0.5,
+    TaskStatus.IN_PROGRESS: 0.2,
+    TaskStatus.COMPLETED: 0.25,
+    TaskStatus.CANCELLED: 0.05,
+}
+
+CHUNK_SIZE = 5000
+
+
+def make_engine(database_url: str) -> AsyncEngine:
+    """Движок БД (SQLite в памяти - одно общее соединение, файл SQLite - в режиме WAL)"""
+    if database_url.startswith("sqlite"):
+        if ":memory:" in database_url:
+            return create_async_engine(
+                database_url,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+            )
+        engine = create_async_engine(database_url, connect_args={"timeout": 30})
+        
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_wal(dbapi_connection, connection_record):
+            # WAL: чтения не ждут пишущую транзакцию
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.close()
+        
+        return engine
+    return create_async_engine(database_url, pool_size=20, max_overflow=20)
+
+
+async def seed_dataset(
+    engine: AsyncEngine,
+    users: int,
+    tasks_per_user: int,
+    seed: int = 42
+) -> list[int]:
+    """Создать таблицы (если нет) и данные, вернуть telegram_id пользователей"""
+    rng = random.Random(seed)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    telegram_ids = [TELEGRAM_ID_BASE + i for i in range(users)]
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async with session_factory() as db:
+        await db.execute(insert(User), [
+            {"telegram_id": telegram_id, "username": f"load{telegram_id}"}
+            for telegram_id in telegram_ids
+        ])
+        result = await db.execute(
+            select(User.id).where(User.telegram_id.in_(telegram_ids)).order_by(User.telegram_id)
+        )
+        user_ids = result.scalars().all()
+        
+        now = datetime.now(timezone.utc)
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        counters: dict[tuple[int, TaskStatus], int] = {}
+        rows = []
+        
+        for user_id in user_ids:
+            for i in range(tasks_per_user):
+                status = rng.choices(statuses, weights)[0]
+                created_at = now - timedelta(minutes=rng.randint(1, 60 * 24 * 90))
+                rows.append({
+                    "user_id": user_id,
+                    "title": f"Задача {i}",
+                    "description": "Описание задачи " * rng.randint(0, 8) or None,
+                    "status": status,
+                    "priority": rng.choice(list(TaskPriority)),
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "completed_at": created_at if status == TaskStatus.COMPLETED else None,
+                    "is_deleted": False,
+                })
+                counters[(user_id, status)] = counters.get((user_id, status), 0) + 1
+                
+                if len(rows) >= CHUNK_SIZE:
+                    await db.execute(insert(Task), rows)
+                    rows = []
+        if rows:
+            await db.execute(insert(Task), rows)
+        
+        if counters:
+            await db.execute(insert(TaskCounter), [
+                {"user_id": user_id, "status": status, "count": count}
+                for (user_id, status), count in counters.items()
+            ])
+        await db.commit()
+    
+    return telegram_ids
+
+
+async def main():
+    """Главная функция наполнения"""
+    parser = argparse.ArgumentParser(description="Наполнение БД для нагрузочного теста")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=50, help="Задач на пользователя")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    engine = make_engine(args.database_url)
+    try:
+        telegram_ids = await seed_dataset(engine, args.users, args.tasks, args.seed)
+    finally:
+        await engine.dispose()
+    print(f"Создано пользователей: {len(telegram_ids)} "
+          f"(telegram_id {telegram_ids[0]}..{telegram_ids[-1]}), "
+          f"задач: {len(telegram_ids) * args.tasks}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
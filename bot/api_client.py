@@ -0,0 +1,67 @@
+"""
+HTTP-клиент бота к API задач
+"""
+
+from typing import Optional
+import aiohttp
+from app.core.config import settings
+
+
+class TaskAPIClient:
+    """Общий для всего бота клиент API с пулом keep-alive соединений"""
+    
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None
+    ):
+        self.base_url = (base_url or settings.BOT_API_URL).rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(
+            total=timeout or settings.BOT_API_TIMEOUT,
+            connect=connect_timeout or settings.BOT_API_CONNECT_TIMEOUT
+        )
+        self.max_connections = max_connections or settings.BOT_API_MAX_CONNECTIONS
+        self.keepalive_timeout = keepalive_timeout or settings.BOT_API_KEEPALIVE_TIMEOUT
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def start(self) -> None:
+        """Создать сессию (вызывается при старте диспетчера)"""
+        if self._session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+    
+    async def close(self) -> None:
+        """Закрыть сессию и соединения (вызывается при остановке диспетчера)"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError("TaskAPIClient не запущен: вызовите start()")
+        return self._session
+    
+    def get(self, path: str, **kwargs):
+        """GET-запрос к API (использовать как async with)"""
+        return self.session.get(f"{self.base_url}{path}", **kwargs)
+    
+    def post(self, path: str, **kwargs):
+        """POST-запрос к API (использовать как async with)"""
+        return self.session.post(f"{self.base_url}{path}", **kwargs)
+    
+    def put(self, path: str, **kwargs):
+        """PUT-запрос к API (использовать как async with)"""
+        return self.session.put(f"{self.base_url}{path}", **kwargs)
+    
+    def delete(self, path: str, **kwargs):
+        """DELETE-запрос к API (использовать как async with)"""
+        return self.session.delete(f"{self.base_url}{path}", **kwargs)
@@ -14,11 +14,9 @@ from aiogram.filters import Command
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-import aiohttp
-from app.core.config import settings
+from bot.api_client import TaskAPIClient
 
 router = Router()
-API_URL = f"http://localhost:8000/api"  # В продакшене используйте переменную окружения
 
 
 class TaskCreation(StatesGroup):
@@ -27,46 +25,45 @@ class TaskCreation(StatesGroup):
 
 
 @router.message(Command("tasks"))
-async def cmd_tasks(message: Message):
+async def cmd_tasks(message: Message, api: TaskAPIClient):
     """Показать список задач"""
     telegram_id = message.from_user.id
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_URL}/tasks", params={"telegram_id": telegram_id}) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                tasks = data.get("items", [])
-                
-                if not tasks:
-                    await message.answer("📝 У вас пока нет задач")
-                    return
+    async with api.get("/tasks", params={"telegram_id": telegram_id}) as resp:
+        if resp.status == 200:
+            data = await resp.json()
+            tasks = data.get("items", [])
+            
+            if not tasks:
+                await message.answer("📝 У вас пока нет задач")
+                return
+            
+            text = "📋 Ваши задачи:\n\n"
+            for task in tasks[:10]:  # Показываем первые 10
+                status_emoji = {
+                    "pending": "⏳",
+                    "in_progress": "🔄",
+                    "completed": "✅",
+                    "cancelled": "❌"
+                }
+                priority_emoji = {
+                    "low": "🟢",
+                    "medium": "🟡",
+                    "high": "🔴",
+                    "urgent": "🔴"
+                }
                 
-                text = "📋 Ваши задачи:\n\n"
-                for task in tasks[:10]:  # Показываем первые 10
-                    status_emoji = {
-                        "pending": "⏳",
-                        "in_progress": "🔄",
-                        "completed": "✅",
-                        "cancelled": "❌"
-                    }
-                    priority_emoji = {
-                        "low": "🟢",
-                        "medium": "🟡",
-                        "high": "🔴",
-                        "urgent": "🔴"
-                    }
-                    
-                    emoji = status_emoji.get(task["status"], "📝")
-                    priority = priority_emoji.get(task["priority"], "🟡")
-                    
-                    text += f"{emoji} {task['title']} {priority}\n"
-                    if task.get("description"):
-                        text += f"   {task['description'][:50]}...\n"
-                    text += "\n"
+                emoji = status_emoji.get(task["status"], "📝")
+                priority = priority_emoji.get(task["priority"], "🟡")
                 
-                await message.answer(text)
-            else:
-                await message.answer("❌ Ошибка при получении задач")
+                text += f"{emoji} {task['title']} {priority}\n"
+                if task.get("description"):
+                    text += f"   {task['description'][:50]}...\n"
+                text += "\n"
+            
+            await message.answer(text)
+        else:
+            await message.answer("❌ Ошибка при получении задач")
 
 
 @router.message(Command("add"))
@@ -85,19 +82,19 @@ async def process_title(message: Message, state: FSMContext):
 
 
 @router.message(Command("skip"), TaskCreation.waiting_for_description)
-async def skip_description(message: Message, state: FSMContext):
+async def skip_description(message: Message, state: FSMContext, api: TaskAPIClient):
     """Пропустить описание"""
-    await create_task(message, state)
+    await create_task(message, state, api)
 
 
 @router.message(TaskCreation.waiting_for_description)
-async def process_description(message: Message, state: FSMContext):
+async def process_description(message: Message, state: FSMContext, api: TaskAPIClient):
     """Обработать описание задачи"""
     await state.update_data(description=message.text)
-    await create_task(message, state)
+    await create_task(message, state, api)
 
 
-async def create_task(message: Message, state: FSMContext):
+async def create_task(message: Message, state: FSMContext, api: TaskAPIClient):
     """Создать задачу через API"""
     data = await state.get_data()
     user = message.from_user
@@ -119,21 +116,20 @@ async def create_task(message: Message, state: FSMContext):
         params["last_name"] = user.last_name
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{API_URL}/tasks",
-                json=task_data,
-                params=params
-            ) as resp:
-                if resp.status == 201:
-                    await message.answer("✅ Задача создана!")
-                else:
-                    error_text = await resp.text()
-                    await message.answer(
-                        f"❌ Ошибка при создании задачи\n"
-                        f"Код: {resp.status}\n"
-                        f"Детали: {error_text[:200]}"
-                    )
+        async with api.post(
+            "/tasks",
+            json=task_data,
+            params=params
+        ) as resp:
+            if resp.status == 201:
+                await message.answer("✅ Задача создана!")
+            else:
+                error_text = await resp.text()
+                await message.answer(
+                    f"❌ Ошибка при создании задачи\n"
+                    f"Код: {resp.status}\n"
+                    f"Детали: {error_text[:200]}"
+                )
     except Exception as e:
         await message.answer(f"❌ Ошибка подключения к API: {str(e)}")
     
@@ -141,7 +137,7 @@ async def create_task(message: Message, state: FSMContext):
 
 
 @router.message(Command("complete"))
-async def cmd_complete(message: Message):
+async def cmd_complete(message: Message, api: TaskAPIClient):
     """Завершить задачу"""
     telegram_id = message.from_user.id
     command_parts = message.text.split()
@@ -155,75 +151,77 @@ async def cmd_complete(message: Message):
             return
         
         # Завершаем задачу по ID
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{API_URL}/tasks/{task_id}/complete",
-                params={"telegram_id": telegram_id}
-            ) as resp:
-                if resp.status == 200:
-                    task = await resp.json()
-                    # Форматируем время
-                    completed_at = task.get('completed_at')
-                    if completed_at:
-                        try:
-                            dt = datetime.fromisoformat(completed_at.replace('Z', '+00:00'))
-                            # Конвертируем в локальное время (UTC+3 для примера, можно настроить)
-                            formatted_time = dt.strftime('%d.%m.%Y %H:%M')
-                        except:
-                            formatted_time = completed_at
-                    else:
-                        formatted_time = "только что"
-                    
-                    await message.answer(
-                        f"✅ Задача завершена!\n\n"
-                        f"📝 {task['title']}\n"
-                        f"🕐 Завершена: {formatted_time}"
-                    )
-                elif resp.status == 404:
-                    await message.answer("❌ Задача не найдена или уже завершена")
-                else:
-                    error_text = await resp.text()
-                    await message.answer(
-                        f"❌ Ошибка при завершении задачи\n"
-                        f"Код: {resp.status}\n"
-                        f"Детали: {error_text[:200]}"
-                    )
-        return
-    
-    # Если ID не указан, показываем список незавершенных задач
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_URL}/tasks", params={"telegram_id": telegram_id}) as resp:
+        async with api.post(
+            f"/tasks/{task_id}/complete",
+            params={"telegram_id": telegram_id}
+        ) as resp:
             if resp.status == 200:
-                data = await resp.json()
-                tasks = data.get("items", [])
-                
-                # Фильтруем только незавершенные задачи
-                pending_tasks = [t for t in tasks if t["status"] in ["pending", "in_progress"]]
-                
-                if not pending_tasks:
-                    await message.answer("✅ У вас нет незавершенных задач!")
-                    return
-                
-                # Показываем список задач с ID
-                text = "📋 Ваши незавершенные задачи:\n\n"
-                for task in pending_tasks[:10]:
-                    status_emoji = {
-                        "pending": "⏳",
-                        "in_progress": "🔄"
-                    }
-                    emoji = status_emoji.get(task["status"], "📝")
-                    text += f"{emoji} [{task['id']}] {task['title']}\n"
-                
-                text += "\n💡 Для завершения отправьте: /complete <ID_задачи>"
-                text += f"\nНапример: /complete {pending_tasks[0]['id']}"
+                task = await resp.json()
+                # Форматируем время
+                completed_at = task.get('completed_at')
+                if completed_at:
+                    try:
+                        dt = datetime.fromisoformat(completed_at.replace('Z', '+00:00'))
+                        # Конвертируем в локальное время (UTC+3 для примера, можно настроить)
+                        formatted_time = dt.strftime('%d.%m.%Y %H:%M')
+                    except:
+                        formatted_time = completed_at
+                else:
+                    formatted_time = "только что"
                 
-                await message.answer(text)
+                await message.answer(
+                    f"✅ Задача завершена!\n\n"
+                    f"📝 {task['title']}\n"
+                    f"🕐 Завершена: {formatted_time}"
+                )
+            elif resp.status == 404:
+                await message.answer("❌ Задача не найдена или уже завершена")
             else:
-                await message.answer("❌ Ошибка при получении задач")
+                error_text = await resp.text()
+                await message.answer(
+                    f"❌ Ошибка при завершении задачи\n"
+                    f"Код: {resp.status}\n"
+                    f"Детали: {error_text[:200]}"
+                )
+        return
+    
+    # Если ID не указан, показываем список незавершенных задач (фильтр на стороне API)
+    params = [
+        ("telegram_id", telegram_id),
+        ("status", "pending"),
+        ("status", "in_progress"),
+        ("fields", "id,title,status"),
+        ("page_size", 10),
+    ]
+    async with api.get("/tasks", params=params) as resp:
+        if resp.status == 200:
+            data = await resp.json()
+            pending_tasks = data.get("items", [])
+            
+            if not pending_tasks:
+                await message.answer("✅ У вас нет незавершенных задач!")
+                return
+            
+            # Показываем список задач с ID
+            text = "📋 Ваши незавершенные задачи:\n\n"
+            for task in pending_tasks:
+                status_emoji = {
+                    "pending": "⏳",
+                    "in_progress": "🔄"
+                }
+                emoji = status_emoji.get(task["status"], "📝")
+                text += f"{emoji} [{task['id']}] {task['title']}\n"
+            
+            text += "\n💡 Для завершения отправьте: /complete <ID_задачи>"
+            text += f"\nНапример: /complete {pending_tasks[0]['id']}"
+            
+            await message.answer(text)
+        else:
+            await message.answer("❌ Ошибка при получении задач")
 
 
 @router.message(Command("start_task"))
-async def cmd_start_task(message: Message):
+async def cmd_start_task(message: Message, api: TaskAPIClient):
     """Начать работу над задачей (перевести в статус in_progress)"""
     telegram_id = message.from_user.id
     command_parts = message.text.split()
@@ -237,74 +235,74 @@ async def cmd_start_task(message: Message):
             return
         
         # Обновляем статус задачи на in_progress
-        async with aiohttp.ClientSession() as session:
-            async with session.put(
-                f"{API_URL}/tasks/{task_id}",
-                params={"telegram_id": telegram_id},
-                json={"status": "in_progress"}
-            ) as resp:
-                if resp.status == 200:
-                    task = await resp.json()
-                    await message.answer(
-                        f"🔄 Задача переведена в работу!\n\n"
-                        f"📝 {task['title']}\n"
-                        f"📊 Статус: В работе"
-                    )
-                elif resp.status == 404:
-                    await message.answer("❌ Задача не найдена")
-                else:
-                    error_text = await resp.text()
-                    await message.answer(
-                        f"❌ Ошибка при обновлении задачи\n"
-                        f"Код: {resp.status}\n"
-                        f"Детали: {error_text[:200]}"
-                    )
-        return
-    
-    # Если ID не указан, показываем список задач в ожидании
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_URL}/tasks", params={"telegram_id": telegram_id}) as resp:
+        async with api.put(
+            f"/tasks/{task_id}",
+            params={"telegram_id": telegram_id},
+            json={"status": "in_progress"}
+        ) as resp:
             if resp.status == 200:
-                data = await resp.json()
-                tasks = data.get("items", [])
-                
-                # Фильтруем только задачи в ожидании
-                pending_tasks = [t for t in tasks if t["status"] == "pending"]
-                
-                if not pending_tasks:
-                    await message.answer("✅ У вас нет задач в ожидании!")
-                    return
-                
-                # Показываем список задач с ID
-                text = "📋 Задачи в ожидании:\n\n"
-                for task in pending_tasks[:10]:
-                    text += f"⏳ [{task['id']}] {task['title']}\n"
-                
-                text += "\n💡 Для начала работы отправьте: /start_task <ID_задачи>"
-                text += f"\nНапример: /start_task {pending_tasks[0]['id']}"
-                
-                await message.answer(text)
+                task = await resp.json()
+                await message.answer(
+                    f"🔄 Задача переведена в работу!\n\n"
+                    f"📝 {task['title']}\n"
+                    f"📊 Статус: В работе"
+                )
+            elif resp.status == 404:
+                await message.answer("❌ Задача не найдена")
             else:
-                await message.answer("❌ Ошибка при получении задач")
+                error_text = await resp.text()
+                await message.answer(
+                    f"❌ Ошибка при обновлении задачи\n"
+                    f"Код: {resp.status}\n"
+                    f"Детали: {error_text[:200]}"
+                )
+        return
+    
+    # Если ID не указан, показываем список задач в ожидании (фильтр на стороне API)
+    params = {
+        "telegram_id": telegram_id,
+        "status": "pending",
+        "fields": "id,title",
+        "page_size": 10,
+    }
+    async with api.get("/tasks", params=params) as resp:
+        if resp.status == 200:
+            data = await resp.json()
+            pending_tasks = data.get("items", [])
+            
+            if not pending_tasks:
+                await message.answer("✅ У вас нет задач в ожидании!")
+                return
+            
+            # Показываем список задач с ID
+            text = "📋 Задачи в ожидании:\n\n"
+            for task in pending_tasks:
+                text += f"⏳ [{task['id']}] {task['title']}\n"
+            
+            text += "\n💡 Для начала работы отправьте: /start_task <ID_задачи>"
+            text += f"\nНапример: /start_task {pending_tasks[0]['id']}"
+            
+            await message.answer(text)
+        else:
+            await message.answer("❌ Ошибка при получении задач")
 
 
 @router.message(Command("stats"))
-async def cmd_stats(message: Message):
+async def cmd_stats(message: Message, api: TaskAPIClient):
     """Показать статистику"""
     telegram_id = message.from_user.id
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_URL}/stats", params={"telegram_id": telegram_id}) as resp:
-            if resp.status == 200:
-                stats = await resp.json()
-                text = (
-                    f"📊 Статистика:\n\n"
-                    f"Всего: {stats['total']}\n"
-                    f"✅ Выполнено: {stats['completed']}\n"
-                    f"⏳ В ожидании: {stats['pending']}\n"
-                    f"🔄 В работе: {stats['in_progress']}"
-                )
-                await message.answer(text)
-            else:
-                await message.answer("❌ Ошибка при получении статистики")
+    async with api.get("/stats", params={"telegram_id": telegram_id}) as resp:
+        if resp.status == 200:
+            stats = await resp.json()
+            text = (
+                f"📊 Статистика:\n\n"
+                f"Всего: {stats['total']}\n"
+                f"✅ Выполнено: {stats['completed']}\n"
+                f"⏳ В ожидании: {stats['pending']}\n"
+                f"🔄 В работе: {stats['in_progress']}"
+            )
+            await message.answer(text)
+        else:
+            await message.answer("❌ Ошибка при получении статистики")
 
@@ -13,6 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from aiogram import Bot, Dispatcher
 from aiogram.filters import Command
 from aiogram.types import Message
+from bot.api_client import TaskAPIClient
 from bot.handlers import task_handlers
 from app.core.config import settings
 
@@ -24,7 +25,10 @@ logger = logging.getLogger(__name__)
 
 # Инициализация бота
 bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
-dp = Dispatcher()
+
+# Клиент API передается в обработчики как аргумент api
+api_client = TaskAPIClient()
+dp = Dispatcher(api=api_client)
 
 # Регистрация обработчиков
 dp.include_router(task_handlers.router)
@@ -44,6 +48,18 @@ async def cmd_start(message: Message):
     )
 
 
+@dp.startup()
+async def on_startup():
+    """Открыть пул соединений к API"""
+    await api_client.start()
+
+
+@dp.shutdown()
+async def on_shutdown():
+    """Закрыть пул соединений к API"""
+    await api_client.close()
+
+
 async def main():
     """Главная функция"""
     logger.info("🚀 Бот запущен")
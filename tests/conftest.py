@@ -6,8 +6,10 @@ import pytest
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_read_db
 from app.main import app
+from app.core.rate_limit import rate_limiter
+from app.services.user_service import user_id_cache
 from httpx import AsyncClient
 
 # Тестовая БД в памяти
@@ -51,6 +53,9 @@ async def client(db_session):
         yield db_session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    user_id_cache.clear()
+    rate_limiter.reset()
     
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
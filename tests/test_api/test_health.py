@@ -0,0 +1,50 @@
+"""
+Тесты служебных endpoints
+"""
+
+import pytest
+from httpx import AsyncClient
+from app.services.user_service import UserService, user_id_cache
+
+
+@pytest.mark.asyncio
+async def test_user_id_cache_stats(client: AsyncClient):
+    """Тест попаданий в кэш telegram_id -> users.id"""
+    response = await client.post("/api/tasks?telegram_id=7", json={"title": "Задача"})
+    task_id = response.json()["id"]
+    # GET-запросы читают id вместе с версией задач (ETag), кэш используют изменения
+    await client.put(f"/api/tasks/{task_id}?telegram_id=7", json={"title": "Новое название"})
+    await client.post(f"/api/tasks/{task_id}/complete?telegram_id=7")
+    await client.post(f"/api/tasks/{task_id}/complete?telegram_id=8")
+    
+    response = await client.get("/health/cache")
+    assert response.status_code == 200
+    local = response.json()["user_id"]["local"]
+    assert local["hits"] == 2
+    assert local["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_right_after_update(client: AsyncClient):
+    """Тест: версия задач для ETag не берется из кэша и меняется сразу после изменения"""
+    response = await client.post("/api/tasks?telegram_id=7", json={"title": "Задача"})
+    task_id = response.json()["id"]
+    first = await client.get("/api/tasks?telegram_id=7")
+    
+    await client.put(f"/api/tasks/{task_id}?telegram_id=7", json={"title": "Новое название"})
+    response = await client.get(
+        "/api/tasks?telegram_id=7", headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["items"][0]["title"] == "Новое название"
+
+
+@pytest.mark.asyncio
+async def test_user_id_cache_skips_rolled_back_user(db_session):
+    """Тест: id пользователя из откаченной транзакции не попадает в кэш"""
+    user_id_cache.clear()
+    await UserService.upsert_user(db_session, 9)
+    await db_session.rollback()
+    
+    assert await user_id_cache.get(9) is None
+    assert await UserService.get_user_id(db_session, 9) is None
@@ -0,0 +1,49 @@
+"""
+Тесты метрик Prometheus
+"""
+
+import pytest
+from httpx import AsyncClient
+from app.core.metrics import Histogram, registry
+
+
+def test_histogram_render():
+    """Тест накопленных корзин, суммы и количества"""
+    histogram = Histogram("test_seconds", "Тест", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    
+    samples = list(histogram.samples())
+    assert samples == [
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1.0"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 5.55',
+        'test_seconds_count{route="/a"} 3',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient):
+    """Тест метрик запросов по шаблону маршрута и SQL на запрос"""
+    registry.clear()
+    response = await client.post("/api/tasks?telegram_id=11", json={"title": "Задача"})
+    task_id = response.json()["id"]
+    await client.get(f"/api/tasks/{task_id}?telegram_id=11")
+    await client.get("/health/cache")
+    
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/api/tasks/{task_id}",status="200"} 1'
+        in body
+    )
+    assert 'http_requests_in_flight{method="GET"} 1' in body  # сам запрос /metrics
+    assert 'db_queries_per_request_count{method="POST",route="/api/tasks"} 1' in body
+    assert 'db_queries_per_request_sum{method="POST",route="/api/tasks"} 0' not in body
+    assert 'db_queries_per_request_sum{method="GET",route="/health/cache"} 0.0' in body
+    assert 'cache_requests_total{cache="user_id_local",result="miss"}' in body
+    assert 'db_pool_checked_out{pool="primary"}' in body
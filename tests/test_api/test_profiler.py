@@ -0,0 +1,61 @@
+"""
+Тесты профилирования SQL
+"""
+
+import pytest
+from httpx import AsyncClient
+from app.core import profiler
+from app.core.config import settings
+
+
+@pytest.fixture
+def sql_profile(monkeypatch):
+    """Включить профилирование SQL"""
+    monkeypatch.setattr(settings, "SQL_PROFILE", True)
+    profiler.history.clear()
+
+
+def test_findings():
+    """Тест обнаружения дублей, повторов в цикле и загрузок связей"""
+    profile = profiler.RequestProfile(1, "GET", "/api/tasks")
+    for params_key in (1, 1, 2, 3):
+        profile.queries.append(profiler.QueryRecord("SELECT * FROM users WHERE id = ?", params_key, False))
+    profile.queries.append(profiler.QueryRecord("SELECT 1", 1, False))
+    profile.relationship_loads["Task.user"] += 1
+    
+    findings = {finding["type"]: finding for finding in profile.findings()}
+    assert findings["duplicate"]["count"] == 2
+    assert findings["repeated"]["count"] == 4
+    assert findings["relationship_load"]["relationship"] == "Task.user"
+    assert "duplicates=1; repeated=1; relationship_loads=1" in profile.summary()
+
+
+@pytest.mark.asyncio
+async def test_profile_header_and_endpoint(client: AsyncClient, sql_profile):
+    """Тест заголовка X-SQL-Profile и /debug/sql"""
+    response = await client.post("/api/tasks?telegram_id=21", json={"title": "Задача"})
+    task_id = response.json()["id"]
+    
+    response = await client.get(f"/api/tasks/{task_id}?telegram_id=21")
+    assert response.status_code == 200
+    header = response.headers["x-sql-profile"]
+    assert "queries=2;" in header
+    assert "relationship_loads=0" in header
+    
+    response = await client.get("/debug/sql?limit=1")
+    assert response.status_code == 200
+    profile = response.json()[0]
+    assert profile["path"] == f"/api/tasks/{task_id}"
+    assert profile["query_count"] == 2
+    assert profile["findings"] == []
+    assert profile["queries"][-1]["rows"] == 1
+
+
+@pytest.mark.asyncio
+async def test_profiler_disabled(client: AsyncClient):
+    """Тест: без SQL_PROFILE нет заголовка и отладочного endpoint"""
+    response = await client.get("/api/tasks?telegram_id=22")
+    assert "x-sql-profile" not in response.headers
+    
+    response = await client.get("/debug/sql")
+    assert response.status_code == 404
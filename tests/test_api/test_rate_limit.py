@@ -0,0 +1,30 @@
+"""
+Тесты ограничения частоты запросов
+"""
+
+import pytest
+from httpx import AsyncClient
+from app.core.rate_limit import rate_limiter
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_telegram_id_and_route_class(client: AsyncClient, monkeypatch):
+    """Тест лимитов по telegram_id отдельно для чтения и записи"""
+    monkeypatch.setitem(rate_limiter.limits, "read", 2)
+    monkeypatch.setitem(rate_limiter.limits, "write", 1)
+    
+    for _ in range(2):
+        response = await client.get("/api/stats?telegram_id=1")
+        assert response.status_code == 200
+    
+    response = await client.get("/api/stats?telegram_id=1")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    
+    # Другой пользователь и запись считаются отдельно
+    response = await client.get("/api/stats?telegram_id=2")
+    assert response.status_code == 200
+    response = await client.post("/api/tasks?telegram_id=1", json={"title": "Запись"})
+    assert response.status_code == 201
+    response = await client.post("/api/tasks?telegram_id=1", json={"title": "Запись"})
+    assert response.status_code == 429
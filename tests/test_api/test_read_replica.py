@@ -0,0 +1,55 @@
+"""
+Тесты маршрутизации чтений на реплику
+"""
+
+import json
+import pytest
+from httpx import AsyncClient
+from app.core import database
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Отдельная фабрика сессий реплики"""
+    replica_factory = object()
+    monkeypatch.setattr(database, "ReadSessionLocal", replica_factory)
+    database.recent_writers.clear()
+    yield replica_factory
+    database.recent_writers.clear()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(replica):
+    """Тест: чтения без недавних изменений идут на реплику"""
+    assert await database.read_session_factory("31") is replica
+    assert await database.read_session_factory(None) is replica
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes(replica, monkeypatch):
+    """Тест: после изменения чтения пользователя идут в основную БД до конца окна"""
+    await database.recent_writers.mark([32])
+    assert await database.read_session_factory("32") is database.AsyncSessionLocal
+    assert await database.read_session_factory("33") is replica
+    
+    monkeypatch.setattr(database.recent_writers.local, "ttl", -1)
+    await database.recent_writers.mark([32])
+    assert await database.read_session_factory("32") is replica
+
+
+@pytest.mark.asyncio
+async def test_only_committed_writes_open_window(replica, client: AsyncClient):
+    """Тест: окно открывают успешные изменения и пользователи импорта, но не ошибки"""
+    response = await client.post("/api/tasks/99999/complete?telegram_id=34")
+    assert response.status_code == 404
+    assert await database.read_session_factory("34") is replica
+    
+    response = await client.post("/api/tasks?telegram_id=34", json={"title": "Задача"})
+    assert response.status_code == 201
+    assert await database.read_session_factory("34") is database.AsyncSessionLocal
+    
+    body = "\n".join(json.dumps({"telegram_id": tg, "title": "Импорт"}) for tg in (35, 36))
+    response = await client.post("/api/tasks/import", content=body.encode())
+    assert response.status_code == 200
+    for telegram_id in ("35", "36"):
+        assert await database.read_session_factory(telegram_id) is database.AsyncSessionLocal
@@ -0,0 +1,90 @@
+"""
+Тесты кэша ответов
+"""
+
+import asyncio
+import pytest
+from httpx import AsyncClient
+from app.services import result_cache as result_cache_module
+from app.services.result_cache import ResultCache, result_cache
+
+
+class FakeRedis:
+    """Минимальный Redis в памяти (get/set NX/delete)"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    async def get(self, key):
+        return self.data.get(key)
+    
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+    
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(result_cache_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(result_cache, "enabled", True)
+    result_cache.clear()
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once(fake_redis):
+    """Тест защиты от одновременных промахов"""
+    cache = ResultCache("test", ttl=60, lock_ttl=1, lock_wait=0.5)
+    calls = 0
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"value"
+    
+    key = cache.key(1, 1, "stats")
+    results = await asyncio.gather(*(cache.get_or_compute(key, compute) for _ in range(10)))
+    assert results == [b"value"] * 10
+    assert calls == 1
+    
+    # Другой процесс держит блокировку - ждем его результат, а не считаем сами
+    other_key = cache.key(1, 2, "stats")
+    fake_redis.data[f"{other_key}:lock"] = b"1"
+    
+    async def publish_later():
+        await asyncio.sleep(0.05)
+        fake_redis.data[other_key] = b"from other process"
+    
+    result, _ = await asyncio.gather(cache.get_or_compute(other_key, compute), publish_later())
+    assert result == b"from other process"
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stats_and_first_page_cached_until_mutation(client: AsyncClient, fake_redis):
+    """Тест кэширования статистики и первой страницы с инвалидацией при изменении"""
+    await client.post("/api/tasks?telegram_id=1", json={"title": "Кэш"})
+    
+    for _ in range(2):
+        stats = await client.get("/api/stats?telegram_id=1")
+        tasks = await client.get("/api/tasks?telegram_id=1")
+    assert result_cache.stats()["hits"] == 2
+    assert result_cache.stats()["misses"] == 2
+    assert stats.json()["pending"] == 1
+    assert stats.headers["etag"]
+    assert tasks.json()["items"][0]["title"] == "Кэш"
+    
+    await client.post("/api/tasks?telegram_id=1", json={"title": "Еще"})
+    
+    stats = await client.get("/api/stats?telegram_id=1")
+    tasks = await client.get("/api/tasks?telegram_id=1")
+    assert stats.json()["pending"] == 2
+    assert tasks.json()["total"] == 2
+    assert result_cache.stats()["misses"] == 4
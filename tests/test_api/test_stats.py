@@ -0,0 +1,54 @@
+"""
+Тесты для API статистики
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from app.models.task_counter import TaskCounter
+from app.services.counter_service import TaskCounterService
+
+
+@pytest.mark.asyncio
+async def test_statistics_follow_mutations(client: AsyncClient):
+    """Тест обновления счетчиков при изменениях задач"""
+    ids = []
+    for title in ("Задача 1", "Задача 2", "Задача 3"):
+        response = await client.post(
+            "/api/tasks?telegram_id=1",
+            json={"title": title, "priority": "medium"}
+        )
+        ids.append(response.json()["id"])
+    
+    await client.put(f"/api/tasks/{ids[0]}?telegram_id=1", json={"status": "in_progress"})
+    await client.post(f"/api/tasks/{ids[1]}/complete?telegram_id=1")
+    await client.delete(f"/api/tasks/{ids[2]}?telegram_id=1")
+    
+    response = await client.get("/api/stats?telegram_id=1")
+    assert response.status_code == 200
+    assert response.json() == {"total": 2, "completed": 1, "pending": 0, "in_progress": 1}
+    
+    response = await client.get("/api/tasks?telegram_id=1&status=completed")
+    data = response.json()
+    assert data["total"] == 1
+    assert data["pages"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift(client: AsyncClient, db_session):
+    """Тест исправления рассинхронизации счетчиков"""
+    response = await client.post(
+        "/api/tasks?telegram_id=1",
+        json={"title": "Задача", "priority": "low"}
+    )
+    user_id = response.json()["user_id"]
+    
+    await db_session.execute(update(TaskCounter).values(count=42))
+    await db_session.commit()
+    
+    fixed = await TaskCounterService.reconcile_user(db_session, user_id)
+    await db_session.commit()
+    assert fixed == 1
+    
+    response = await client.get("/api/stats?telegram_id=1")
+    assert response.json()["total"] == 1
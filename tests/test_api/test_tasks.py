@@ -2,16 +2,24 @@
 Тесты для API задач
 """
 
+import json
 import pytest
+from datetime import datetime, timedelta
 from httpx import AsyncClient
-from app.models.task import TaskStatus, TaskPriority
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.models.user import User
+from app.models.outbox import OutboxEvent, TaskEventType
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.services.counter_service import TaskCounterService
+from app.services.import_service import ImportService
 
 
 @pytest.mark.asyncio
 async def test_create_task(client: AsyncClient):
     """Тест создания задачи"""
     response = await client.post(
-        "/api/tasks?user_id=1",
+        "/api/tasks?telegram_id=1",
         json={
             "title": "Тестовая задача",
             "description": "Описание задачи",
@@ -29,12 +37,12 @@ async def test_get_tasks(client: AsyncClient):
     """Тест получения списка задач"""
     # Создаем задачу
     await client.post(
-        "/api/tasks?user_id=1",
+        "/api/tasks?telegram_id=1",
         json={"title": "Задача 1", "priority": "medium"}
     )
     
     # Получаем список
-    response = await client.get("/api/tasks?user_id=1")
+    response = await client.get("/api/tasks?telegram_id=1")
     assert response.status_code == 200
     data = response.json()
     assert data["total"] >= 1
@@ -46,15 +54,292 @@ async def test_complete_task(client: AsyncClient):
     """Тест завершения задачи"""
     # Создаем задачу
     create_response = await client.post(
-        "/api/tasks?user_id=1",
+        "/api/tasks?telegram_id=1",
         json={"title": "Задача для завершения", "priority": "low"}
     )
     task_id = create_response.json()["id"]
     
     # Завершаем задачу
-    response = await client.post(f"/api/tasks/{task_id}/complete?user_id=1")
+    response = await client.post(f"/api/tasks/{task_id}/complete?telegram_id=1")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == TaskStatus.COMPLETED.value
     assert data["completed_at"] is not None
 
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_cursor_pagination(client: AsyncClient, db_session):
+    """Тест курсорной пагинации с одинаковыми created_at"""
+    create_response = await client.post(
+        "/api/tasks?telegram_id=1",
+        json={"title": "Задача 0", "priority": "medium"}
+    )
+    user_id = create_response.json()["user_id"]
+    
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(1, 6):
+        db_session.add(Task(
+            title=f"Задача {i}",
+            user_id=user_id,
+            status=TaskStatus.PENDING,
+            priority=TaskPriority.MEDIUM,
+            created_at=base + timedelta(minutes=i // 2)
+        ))
+    await TaskCounterService.apply(db_session, user_id, {TaskStatus.PENDING: 5})
+    await db_session.commit()
+    
+    response = await client.get("/api/tasks?telegram_id=1&page_size=2")
+    data = response.json()
+    seen = [item["id"] for item in data["items"]]
+    cursor = data["next_cursor"]
+    
+    while cursor:
+        response = await client.get(
+            "/api/tasks", params={"telegram_id": 1, "page_size": 2, "after": cursor}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        seen += [item["id"] for item in data["items"]]
+        cursor = data["next_cursor"]
+    
+    assert len(seen) == 6
+    assert len(set(seen)) == 6
+    
+    response = await client.get("/api/tasks?telegram_id=1&after=broken")
+    assert response.status_code == 400
+    
+    # Курсор, выданный для -created_at, не продолжает список в другом порядке
+    first_cursor = (await client.get("/api/tasks?telegram_id=1&page_size=2")).json()["next_cursor"]
+    response = await client.get(
+        "/api/tasks", params={"telegram_id": 1, "sort": "created_at", "after": first_cursor}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_create_task_upserts_user(client: AsyncClient, db_session):
+    """Тест обновления профиля пользователя только при изменении полей"""
+    for params in (
+        {"telegram_id": 5, "username": "old"},
+        {"telegram_id": 5, "username": "new", "first_name": "Иван"},
+        {"telegram_id": 5},
+    ):
+        response = await client.post("/api/tasks", params=params, json={"title": "Задача"})
+        assert response.status_code == 201
+    
+    result = await db_session.execute(select(User).where(User.telegram_id == 5))
+    users = result.scalars().all()
+    assert len(users) == 1
+    assert users[0].username == "new"
+    assert users[0].first_name == "Иван"
+
+
+@pytest.mark.asyncio
+async def test_mutations_of_deleted_task_return_404(client: AsyncClient):
+    """Тест 404 при изменении удаленной задачи"""
+    create_response = await client.post(
+        "/api/tasks?telegram_id=1",
+        json={"title": "Задача для удаления", "priority": "low"}
+    )
+    task_id = create_response.json()["id"]
+    
+    response = await client.put(f"/api/tasks/{task_id}?telegram_id=1", json={"status": "completed"})
+    assert response.status_code == 200
+    assert response.json()["completed_at"] is not None
+    
+    response = await client.delete(f"/api/tasks/{task_id}?telegram_id=1")
+    assert response.status_code == 204
+    
+    response = await client.delete(f"/api/tasks/{task_id}?telegram_id=1")
+    assert response.status_code == 404
+    response = await client.post(f"/api/tasks/{task_id}/complete?telegram_id=1")
+    assert response.status_code == 404
+    response = await client.put(f"/api/tasks/{task_id}?telegram_id=1", json={"title": "Новое"})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_multi_status_and_fields(client: AsyncClient):
+    """Тест фильтра по нескольким статусам, сортировки и проекции полей"""
+    ids = []
+    for title in ("Первая", "Вторая", "Третья"):
+        response = await client.post("/api/tasks?telegram_id=1", json={"title": title})
+        ids.append(response.json()["id"])
+    await client.put(f"/api/tasks/{ids[1]}?telegram_id=1", json={"status": "in_progress"})
+    await client.post(f"/api/tasks/{ids[2]}/complete?telegram_id=1")
+    
+    response = await client.get("/api/tasks", params=[
+        ("telegram_id", 1),
+        ("status", "pending"),
+        ("status", "in_progress"),
+        ("sort", "created_at"),
+        ("fields", "id,title,status"),
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert data["items"] == [
+        {"id": ids[0], "title": "Первая", "status": "pending"},
+        {"id": ids[1], "title": "Вторая", "status": "in_progress"},
+    ]
+    
+    response = await client.get("/api/tasks?telegram_id=1&fields=id,secret")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_create_and_state_changes(client: AsyncClient):
+    """Тест пакетного создания, смены статуса и удаления задач"""
+    response = await client.post(
+        "/api/tasks/batch?telegram_id=1",
+        json={"items": [{"title": f"Пакет {i}"} for i in range(3)]}
+    )
+    assert response.status_code == 201
+    items = response.json()["items"]
+    assert [item["task"]["title"] for item in items] == ["Пакет 0", "Пакет 1", "Пакет 2"]
+    ids = [item["id"] for item in items]
+    
+    response = await client.post(
+        "/api/tasks/batch/status?telegram_id=1",
+        json={"ids": [ids[0], ids[1]], "status": "in_progress"}
+    )
+    assert response.status_code == 200
+    assert all(item["task"]["status"] == "in_progress" for item in response.json()["items"])
+    
+    response = await client.post(
+        "/api/tasks/batch/complete?telegram_id=1",
+        json={"ids": [ids[1], 999999, ids[1]]}
+    )
+    results = response.json()["items"]
+    assert [(item["id"], item["ok"]) for item in results] == [(ids[1], True), (999999, False)]
+    assert results[1]["error"] == "not_found"
+    assert results[0]["task"]["completed_at"] is not None
+    
+    response = await client.post(
+        "/api/tasks/batch/delete?telegram_id=1",
+        json={"ids": [ids[2]]}
+    )
+    assert response.json()["items"] == [{"id": ids[2], "ok": True, "task": None, "error": None}]
+    
+    response = await client.get("/api/stats?telegram_id=1")
+    assert response.json() == {"total": 2, "completed": 1, "pending": 0, "in_progress": 1}
+    
+    response = await client.post("/api/tasks/batch?telegram_id=1", json={"items": []})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_export_tasks(client: AsyncClient):
+    """Тест потоковой выгрузки задач в NDJSON и CSV"""
+    for i in range(3):
+        await client.post("/api/tasks?telegram_id=1", json={"title": f"Задача {i}"})
+    
+    response = await client.get("/api/tasks/export?telegram_id=1")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Задача 0", "Задача 1", "Задача 2"]
+    assert rows[0]["status"] == "pending"
+    
+    # httpx сам распаковывает Content-Encoding: gzip
+    response = await client.get("/api/tasks/export?telegram_id=1&format=csv&gzip=true")
+    assert response.headers["content-encoding"] == "gzip"
+    lines = response.text.splitlines()
+    assert lines[0].startswith("id,title,description,status")
+    assert len(lines) == 4
+    
+    response = await client.get("/api/tasks/export?telegram_id=2&format=csv")
+    assert response.text.splitlines() == [lines[0]]
+
+
+@pytest.mark.asyncio
+async def test_import_tasks(client: AsyncClient, db_session):
+    """Тест импорта задач с ошибочными строками"""
+    body = "\n".join([
+        json.dumps({"telegram_id": 1, "title": "Импорт 1"}),
+        json.dumps({"telegram_id": 2, "title": "Импорт 2", "status": "completed"}),
+        "{не json",
+        json.dumps({"telegram_id": 1, "title": ""}),
+    ])
+    response = await client.post("/api/tasks/import", content=body.encode())
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["rows"], result["imported"], result["failed"]) == (4, 2, 2)
+    assert [error["line"] for error in result["errors"]] == [3, 4]
+    
+    csv_body = 'telegram_id,title,description,priority\n1,CSV,"две\nстроки",high\n1\n'
+    response = await client.post("/api/tasks/import?format=csv", content=csv_body.encode())
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (1, 1)
+    
+    response = await client.get("/api/tasks?telegram_id=1&sort=created_at")
+    tasks = response.json()["items"]
+    assert [task["title"] for task in tasks] == ["Импорт 1", "CSV"]
+    assert tasks[1]["description"] == "две\nстроки"
+    
+    response = await client.get("/api/stats?telegram_id=2")
+    assert response.json()["completed"] == 1
+    
+    # Импортированные задачи публикуются так же, как созданные через API
+    result = await db_session.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+    events = result.scalars().all()
+    assert [event.event_type for event in events] == [TaskEventType.CREATED.value] * 3
+    assert [event.payload["title"] for event in events] == ["Импорт 1", "Импорт 2", "CSV"]
+    assert events[1].payload["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_import_retries_failed_chunk(db_session, monkeypatch):
+    """Тест: ошибка БД в одной строке не отклоняет остальные строки пачки"""
+    insert_chunk = ImportService._insert_chunk
+    
+    async def failing_insert_chunk(db, rows):
+        if any(row.title == "Ошибка БД" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("constraint violation"))
+        await insert_chunk(db, rows)
+    
+    monkeypatch.setattr(ImportService, "_insert_chunk", failing_insert_chunk)
+    titles = ["Первая", "Вторая", "Ошибка БД", "Четвертая", "Пятая"]
+    body = "\n".join(json.dumps({"telegram_id": 3, "title": title}) for title in titles)
+    
+    async def chunks():
+        yield body.encode()
+    
+    result = await ImportService.import_tasks(db_session, chunks(), chunk_size=5)
+    assert (result.imported, result.failed) == (4, 1)
+    assert [error.line for error in result.errors] == [3]
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_with_etag(client: AsyncClient):
+    """Тест ETag и ответа 304 для списка, задачи и статистики"""
+    response = await client.post("/api/tasks?telegram_id=1", json={"title": "ETag"})
+    task_id = response.json()["id"]
+    
+    urls = ["/api/tasks?telegram_id=1", f"/api/tasks/{task_id}?telegram_id=1", "/api/stats?telegram_id=1"]
+    etags = []
+    for url in urls:
+        response = await client.get(url)
+        assert response.status_code == 200
+        etags.append(response.headers["etag"])
+        
+        response = await client.get(url, headers={"If-None-Match": etags[-1]})
+        assert response.status_code == 304
+        assert response.content == b""
+    
+    await client.post(f"/api/tasks/{task_id}/complete?telegram_id=1")
+    
+    for url, etag in zip(urls, etags):
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    
+    # ETag пользователя не превращает несуществующую задачу в 304, у задач разные ETag
+    response = await client.get("/api/tasks/99999?telegram_id=1", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+    other = await client.post("/api/tasks?telegram_id=1", json={"title": "Другая"})
+    first = await client.get(f"/api/tasks/{task_id}?telegram_id=1")
+    second = await client.get(f"/api/tasks/{other.json()['id']}?telegram_id=1")
+    assert first.headers["etag"] != second.headers["etag"]
@@ -0,0 +1,95 @@
+"""
+Проверка планов запросов к задачам на PostgreSQL (после alembic upgrade head)
+"""
+
+import json
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        not settings.DATABASE_URL.startswith("postgresql"),
+        reason="Требуется PostgreSQL"
+    ),
+]
+
+SEED_USERS = 200
+SEED_TASKS_PER_USER = 100
+SEED_TELEGRAM_ID_BASE = 2_000_000_000
+
+# Запросы повторяют TaskService.get_tasks / get_tasks_after / count_tasks
+QUERIES = {
+    "ix_tasks_user_created_active": (
+        "SELECT * FROM tasks WHERE user_id = :user_id AND is_deleted = false "
+        "ORDER BY created_at DESC, id DESC LIMIT 20 OFFSET 40"
+    ),
+    "ix_tasks_user_status_created_active": (
+        "SELECT * FROM tasks WHERE user_id = :user_id AND is_deleted = false "
+        "AND status = 'PENDING' ORDER BY created_at DESC, id DESC LIMIT 20"
+    ),
+}
+CURSOR_QUERY = (
+    "SELECT * FROM tasks WHERE user_id = :user_id AND is_deleted = false "
+    "AND (created_at, id) < (now() - interval '30 minutes', 2147483647) "
+    "ORDER BY created_at DESC, id DESC LIMIT 21"
+)
+
+
+def _index_names(plan: dict) -> set[str]:
+    """Собрать имена индексов из JSON-плана"""
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+@pytest.mark.asyncio
+async def test_task_queries_use_access_path_indexes():
+    """Тест использования композитных частичных индексов на наполненной таблице"""
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        try:
+            conn = await engine.connect()
+        except OSError:
+            pytest.skip("PostgreSQL недоступен")
+        
+        async with conn:
+            trans = await conn.begin()
+            try:
+                await conn.execute(text(
+                    "INSERT INTO users (telegram_id, is_active) "
+                    "SELECT :base + g, true FROM generate_series(1, :users) g"
+                ), {"base": SEED_TELEGRAM_ID_BASE, "users": SEED_USERS})
+                await conn.execute(text(
+                    "INSERT INTO tasks (title, status, priority, user_id, is_deleted, created_at, updated_at) "
+                    "SELECT 'seed ' || g, "
+                    "(ARRAY['PENDING','IN_PROGRESS','COMPLETED','CANCELLED'])[1 + g % 4]::taskstatus, "
+                    "'MEDIUM', u.id, g % 10 = 0, now() - g * interval '1 minute', now() "
+                    "FROM users u, generate_series(1, :tasks) g WHERE u.telegram_id > :base"
+                ), {"base": SEED_TELEGRAM_ID_BASE, "tasks": SEED_TASKS_PER_USER})
+                await conn.execute(text("ANALYZE tasks"))
+                
+                user_id = (await conn.execute(
+                    text("SELECT id FROM users WHERE telegram_id = :tid"),
+                    {"tid": SEED_TELEGRAM_ID_BASE + SEED_USERS // 2}
+                )).scalar_one()
+                
+                cases = list(QUERIES.items()) + [("ix_tasks_user_created_active", CURSOR_QUERY)]
+                for index_name, query in cases:
+                    result = await conn.execute(
+                        text(f"EXPLAIN (FORMAT JSON) {query}"), {"user_id": user_id}
+                    )
+                    plan = result.scalar_one()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    assert index_name in _index_names(plan[0]["Plan"]), plan
+            finally:
+                await trans.rollback()
+    finally:
+        await engine.dispose()
@@ -0,0 +1,41 @@
+"""
+Тесты релея outbox
+"""
+
+import json
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from app.models.outbox import OutboxEvent
+from workers.outbox_relay import relay_batch
+
+
+@pytest.mark.asyncio
+async def test_mutations_write_outbox_and_relay_publishes(client: AsyncClient, db_session):
+    """Тест записи событий в outbox и их публикации релеем"""
+    response = await client.post("/api/tasks?telegram_id=1", json={"title": "Событие"})
+    task_id = response.json()["id"]
+    await client.post(f"/api/tasks/{task_id}/complete?telegram_id=1")
+    await client.delete(f"/api/tasks/{task_id}?telegram_id=1")
+    
+    published = []
+    
+    async def failing_publish(message):
+        raise ConnectionError("broker down")
+    
+    with pytest.raises(ConnectionError):
+        await relay_batch(db_session, failing_publish, batch_size=10)
+    
+    async def publish(message):
+        published.append(json.loads(message.body))
+    
+    assert await relay_batch(db_session, publish, batch_size=2) == 2
+    assert await relay_batch(db_session, publish, batch_size=2) == 1
+    assert await relay_batch(db_session, publish, batch_size=2) == 0
+    
+    assert [event["event"] for event in published] == ["task.created", "task.completed", "task.deleted"]
+    assert published[1]["task"]["status"] == "completed"
+    assert all(event["id"] == task_id for event in published)
+    
+    result = await db_session.execute(select(func.count(OutboxEvent.id)))
+    assert result.scalar() == 0
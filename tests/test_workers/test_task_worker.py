@@ -0,0 +1,237 @@
+"""
+Тесты пула потребителей очереди задач
+"""
+
+import asyncio
+import json
+import os
+import threading
+import pytest
+from workers.task_worker import (
+    BatchCollector,
+    ConsumerPool,
+    HandlerMode,
+    HandlerRegistry,
+    PermanentError,
+    RETRY_HEADER
+)
+
+
+class FakeChannel:
+    """Канал, запоминающий публикации"""
+    
+    def __init__(self):
+        self.published = []
+    
+    async def basic_publish(self, body, routing_key="", properties=None, **kwargs):
+        self.published.append((routing_key, body, properties.headers))
+
+
+class FakeMessage:
+    """Входящее сообщение с записью подтверждений"""
+    
+    def __init__(self, body, headers=None, redelivered=False):
+        self.body = body
+        self.redelivered = redelivered
+        self.headers = headers or {}
+        self.content_type = "application/json"
+        self.message_id = None
+        self.channel = FakeChannel()
+        self.outcome = None
+    
+    async def ack(self, multiple=False):
+        self.outcome = ("ack", multiple) if multiple else "ack"
+    
+    async def nack(self, multiple=False, requeue=True):
+        self.outcome = ("nack", multiple, requeue) if multiple else ("nack", requeue)
+    
+    async def reject(self, requeue=False):
+        self.outcome = ("reject", requeue)
+
+
+def make_pool(handler, **kwargs):
+    return ConsumerPool("amqp://", "tasks", handler, dead_letter_queue="tasks.dead", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_ack_retry_and_dead_letter():
+    """Тест подтверждения, повтора и dead-letter"""
+    async def handler(task_data):
+        if task_data["fail"]:
+            raise RuntimeError("boom")
+    
+    pool = make_pool(handler, max_retries=1)
+    
+    ok = FakeMessage(json.dumps({"fail": False}).encode())
+    await pool._handle(ok)
+    assert ok.outcome == "ack"
+    
+    failed = FakeMessage(json.dumps({"fail": True}).encode())
+    await pool._handle(failed)
+    assert failed.outcome == "ack"
+    assert failed.channel.published[0][0] == "tasks"
+    assert failed.channel.published[0][2][RETRY_HEADER] == 1
+    
+    exhausted = FakeMessage(json.dumps({"fail": True}).encode(), {RETRY_HEADER: 1})
+    await pool._handle(exhausted)
+    assert exhausted.channel.published[0][0] == "tasks.dead"
+    
+    invalid = FakeMessage(b"not json")
+    await pool._handle(invalid)
+    assert invalid.channel.published[0][0] == "tasks.dead"
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_drain():
+    """Тест ограничения числа обработчиков и дренажа при остановке"""
+    running = 0
+    peak = 0
+    release = asyncio.Event()
+    
+    async def handler(task_data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await release.wait()
+        running -= 1
+    
+    pool = make_pool(handler, concurrency=2)
+    messages = [FakeMessage(b"{}") for _ in range(4)]
+    for message in messages:
+        await pool._on_message(message)
+    await asyncio.sleep(0.01)
+    assert peak == 2
+    
+    stopping = asyncio.create_task(pool.stop(timeout=1))
+    await asyncio.sleep(0.01)
+    release.set()
+    await stopping
+    
+    # Начатые обработчики завершились, ожидавшие очереди вернулись в RabbitMQ
+    assert [m.outcome for m in messages] == ["ack", "ack", ("nack", True), ("nack", True)]
+
+
+@pytest.mark.asyncio
+async def test_batch_mode_acks_and_isolates_failures():
+    """Тест пакетного режима: один ack на пачку, повтор пачки, изоляция сбойного сообщения"""
+    batches = []
+    
+    async def handler(tasks):
+        batches.append([task["n"] for task in tasks])
+        if any(task["n"] == 2 for task in tasks):
+            raise RuntimeError("boom")
+    
+    pool = make_pool(handler, batch_size=2, batch_timeout=0.01)
+    collector = BatchCollector(pool, pool.batch_size, pool.batch_timeout)
+    
+    messages = [FakeMessage(json.dumps({"n": n}).encode()) for n in range(3)]
+    for message in messages:
+        await collector.add(message)
+    await asyncio.sleep(0.05)
+    
+    # Полная пачка по размеру, неполная - по таймауту; сбойная пачка возвращается целиком
+    assert batches == [[0, 1], [2]]
+    assert messages[1].outcome == ("ack", True)
+    assert messages[0].outcome is None
+    assert messages[2].outcome == ("nack", True, True)
+    
+    redelivered = [FakeMessage(json.dumps({"n": n}).encode(), redelivered=True) for n in (3, 2)]
+    for message in redelivered:
+        await collector.add(message)
+    await asyncio.sleep(0.05)
+    
+    assert batches[2:] == [[3, 2], [3], [2]]
+    assert redelivered[0].outcome == "ack"
+    assert redelivered[1].channel.published[0][2][RETRY_HEADER] == 1
+
+
+def handler_pid(task_data):
+    """Обработчик режима process (уровня модуля, чтобы передаваться по имени)"""
+    return os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_handler_registry_modes():
+    """Тест выбора обработчика по событию и режимов выполнения"""
+    registry = HandlerRegistry(threads=1, processes=1)
+    
+    @registry.register()
+    async def default(task_data):
+        return "default"
+    
+    @registry.register("task.updated", mode=HandlerMode.THREAD)
+    def in_thread(task_data):
+        return threading.current_thread().name
+    
+    registry.register("task.completed", mode=HandlerMode.PROCESS)(handler_pid)
+    
+    try:
+        assert await registry({"event": "task.created"}) == "default"
+        assert (await registry({"event": "task.updated"})).startswith("handler")
+        assert await registry({"event": "task.completed"}) != os.getpid()
+    finally:
+        registry.shutdown()
+    
+    with pytest.raises(TypeError):
+        registry.register(mode=HandlerMode.THREAD)(default)
+    
+    empty = HandlerRegistry()
+    with pytest.raises(PermanentError):
+        await empty({"event": "task.created"})
+
+
+@pytest.mark.asyncio
+async def test_process_messages_wait_outside_concurrency_limit():
+    """Тест: сообщения, ждущие место в пуле процессов, не занимают слоты остальных"""
+    registry = HandlerRegistry(processes=1, process_queue=1)
+    registry.register("task.completed", mode=HandlerMode.PROCESS)(handler_pid)
+    handled = []
+    
+    @registry.register()
+    async def default(task_data):
+        handled.append(task_data["n"])
+    
+    pool = make_pool(registry, concurrency=1)
+    await registry._process_slots.acquire()  # пул процессов занят
+    waiting = FakeMessage(json.dumps({"event": "task.completed"}).encode())
+    await pool._on_message(waiting)
+    regular = FakeMessage(json.dumps({"event": "task.created", "n": 1}).encode())
+    await pool._on_message(regular)
+    await asyncio.sleep(0.01)
+    
+    assert handled == [1]
+    assert regular.outcome == "ack"
+    assert waiting.outcome is None
+    
+    stopping = asyncio.create_task(pool.stop(timeout=1))
+    await asyncio.sleep(0.01)
+    registry._process_slots.release()
+    await stopping
+    assert waiting.outcome == ("nack", True)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batch_uses_event_handlers():
+    """Тест пакетного режима с обработчиками событий из registry"""
+    registry = HandlerRegistry(threads=1)
+    batches = []
+    
+    @registry.register("task.updated", mode=HandlerMode.THREAD)
+    def in_thread(task_data):
+        batches.append(("thread", task_data["n"]))
+    
+    @registry.register()
+    async def default(task_data):
+        raise AssertionError("default handler is replaced by the batch handler")
+    
+    async def batch_handler(tasks):
+        batches.append(("batch", [task["n"] for task in tasks]))
+    
+    try:
+        await registry.dispatch_batch(
+            [{"n": 1}, {"event": "task.updated", "n": 2}, {"event": "task.created", "n": 3}],
+            batch_handler
+        )
+    finally:
+        registry.shutdown()
+    assert sorted(batches, key=str) == [("batch", [1, 3]), ("thread", 2)]
@@ -0,0 +1,73 @@
+"""
+Сверка счетчиков задач с таблицей задач
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy import select
+from app.core.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.services.counter_service import TaskCounterService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+async def reconcile(user_id: Optional[int] = None) -> int:
+    """Пересчитать счетчики одного или всех пользователей"""
+    fixed = 0
+    last_id = 0
+    
+    while True:
+        async with AsyncSessionLocal() as session:
+            if user_id is not None:
+                user_ids = [user_id]
+            else:
+                result = await session.execute(
+                    select(User.id)
+                    .where(User.id > last_id)
+                    .order_by(User.id)
+                    .limit(BATCH_SIZE)
+                )
+                user_ids = result.scalars().all()
+        
+        if not user_ids:
+            break
+        
+        # Каждый пользователь сверяется в отдельной короткой транзакции
+        for uid in user_ids:
+            async with AsyncSessionLocal() as session:
+                count = await TaskCounterService.reconcile_user(session, uid)
+                await session.commit()
+            if count:
+                logger.warning(f"Исправлено счетчиков пользователя {uid}: {count}")
+            fixed += count
+        
+        if user_id is not None:
+            break
+        last_id = user_ids[-1]
+    
+    return fixed
+
+
+async def main():
+    """Главная функция сверки"""
+    parser = argparse.ArgumentParser(description="Сверка счетчиков задач")
+    parser.add_argument(
+        "--user-id", type=int, default=None, help="ID пользователя (по умолчанию все)"
+    )
+    args = parser.parse_args()
+    
+    try:
+        fixed = await reconcile(args.user_id)
+        logger.info(f"✅ Сверка завершена, исправлено счетчиков: {fixed}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
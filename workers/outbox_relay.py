@@ -0,0 +1,118 @@
+"""
+Публикация событий из outbox в RabbitMQ
+"""
+
+import asyncio
+import json
+import logging
+import signal
+from typing import Awaitable, Callable
+from aio_pika import connect_robust, Message, DeliveryMode
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.outbox import OutboxEvent
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_message(event: OutboxEvent) -> Message:
+    """Сообщение RabbitMQ для события (message_id позволяет потребителю отсечь повторы)"""
+    body = {
+        "event": event.event_type,
+        "event_id": event.id,
+        "id": event.task_id,
+        "user_id": event.user_id,
+        "task": event.payload,
+        "created_at": event.created_at.isoformat(),
+    }
+    return Message(
+        json.dumps(body, ensure_ascii=False).encode(),
+        content_type="application/json",
+        message_id=f"outbox-{event.id}",
+        type=event.event_type,
+        delivery_mode=DeliveryMode.PERSISTENT
+    )
+
+
+async def relay_batch(
+    db: AsyncSession,
+    publish: Callable[[Message], Awaitable[None]],
+    batch_size: int
+) -> int:
+    """Опубликовать пачку событий и удалить их, вернуть число опубликованных
+    
+    Строки захватываются FOR UPDATE SKIP LOCKED, поэтому несколько релеев делят outbox
+    без блокировок друг друга. Если публикация не подтверждена, транзакция откатывается
+    и события остаются для следующей попытки (доставка at-least-once).
+    """
+    result = await db.execute(
+        select(OutboxEvent)
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    events = result.scalars().all()
+    if not events:
+        await db.rollback()
+        return 0
+    
+    try:
+        # Подтверждения брокера ждем для всей пачки сразу, а не по одному сообщению
+        await asyncio.gather(*(publish(build_message(event)) for event in events))
+    except Exception:
+        await db.rollback()
+        raise
+    
+    await db.execute(
+        delete(OutboxEvent).where(OutboxEvent.id.in_([event.id for event in events]))
+    )
+    await db.commit()
+    return len(events)
+
+
+async def main():
+    """Главная функция релея"""
+    connection = await connect_robust(settings.RABBITMQ_URL)
+    # publisher_confirms: publish завершается только после подтверждения брокером
+    channel = await connection.channel(publisher_confirms=True)
+    await channel.declare_queue(settings.WORKER_QUEUE, durable=True)
+    
+    async def publish(message: Message):
+        await channel.default_exchange.publish(message, routing_key=settings.WORKER_QUEUE)
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    
+    logger.info("🔄 Релей outbox запущен")
+    
+    try:
+        while not stop.is_set():
+            try:
+                async with AsyncSessionLocal() as session:
+                    count = await relay_batch(session, publish, settings.OUTBOX_BATCH_SIZE)
+            except Exception as e:
+                logger.error(f"Ошибка публикации событий: {e}")
+                count = 0
+            
+            if count:
+                logger.info(f"Опубликовано событий: {count}")
+            if count < settings.OUTBOX_BATCH_SIZE:
+                # Пачка неполная - новых событий пока нет
+                try:
+                    await asyncio.wait_for(stop.wait(), settings.OUTBOX_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await connection.close()
+        await engine.dispose()
+    
+    logger.info("Релей outbox остановлен")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
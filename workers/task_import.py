@@ -0,0 +1,63 @@
+"""
+Импорт задач из файла NDJSON/CSV
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from typing import AsyncIterator
+from app.core.database import AsyncSessionLocal, engine
+from app.core.export import ExportFormat
+from app.services.import_service import ImportService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1 << 16
+
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    """Читать файл (или stdin для "-") кусками"""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while True:
+            chunk = await asyncio.to_thread(stream.read, READ_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+async def main():
+    """Главная функция импорта"""
+    parser = argparse.ArgumentParser(description="Импорт задач из NDJSON/CSV")
+    parser.add_argument("path", help="Путь к файлу или - для stdin")
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat], default=None,
+                        help="Формат (по умолчанию по расширению файла)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Строк в одной транзакции")
+    args = parser.parse_args()
+    
+    format = ExportFormat(args.format) if args.format else (
+        ExportFormat.CSV if args.path.endswith(".csv") else ExportFormat.NDJSON
+    )
+    
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await ImportService.import_tasks(
+                session, read_file(args.path), format, args.chunk_size
+            )
+        for error in result.errors:
+            logger.warning(f"Строка {error.line}: {error.error}")
+        logger.info(
+            f"✅ Импорт завершен: {result.imported} из {result.rows} строк, "
+            f"ошибок {result.failed}, {result.rows_per_second} строк/с"
+        )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
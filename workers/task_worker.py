@@ -3,51 +3,502 @@ RabbitMQ воркер для асинхронной обработки зада
 """
 
 import asyncio
+import contextlib
+import enum
 import json
 import logging
-from aio_pika import connect_robust, IncomingMessage
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+from aio_pika import connect_robust, IncomingMessage, Message, DeliveryMode
+from aio_pika.abc import AbstractQueue, AbstractRobustConnection
 from app.core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Заголовок с числом уже выполненных повторов сообщения
+RETRY_HEADER = "x-retries"
 
-async def process_task(message: IncomingMessage):
-    """Обработка задачи из очереди"""
-    async with message.process():
+# Место в пуле процессов уже занято вызывающим кодом (HandlerRegistry.reserve)
+_process_slot_held: ContextVar[bool] = ContextVar("process_slot_held", default=False)
+
+
+class PermanentError(Exception):
+    """Ошибка, которую бессмысленно повторять: сообщение сразу уходит в dead-letter"""
+
+
+class HandlerMode(str, enum.Enum):
+    """Где выполняется обработчик"""
+    ASYNC = "async"  # корутина в цикле событий (I/O)
+    THREAD = "thread"  # синхронная функция в пуле потоков (блокирующий I/O)
+    PROCESS = "process"  # синхронная функция в пуле процессов (CPU)
+
+
+class HandlerRegistry:
+    """Обработчики сообщений по типу события с режимом выполнения
+    
+    Обработчик выбирается по полю event сообщения, при его отсутствии - обработчик
+    по умолчанию (зарегистрированный без типа). Обработчики режима process должны
+    быть функциями уровня модуля: они передаются в процессы по имени.
+    
+    Число задач в пуле процессов ограничено process_queue. Пока пул занят, сообщения
+    остаются неподтвержденными, и prefetch канала останавливает доставку новых.
+    ConsumerPool занимает место в пуле процессов (reserve) до общего слота
+    обработчиков, поэтому ожидающие процесс сообщения не мешают остальным.
+    """
+    
+    def __init__(self, threads: int = 4, processes: int = 0, process_queue: int = 0):
+        self.threads = threads
+        self.processes = processes or os.cpu_count() or 1
+        self._handlers: dict[Optional[str], tuple[Callable, HandlerMode]] = {}
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_slots = asyncio.Semaphore(process_queue or self.processes * 2)
+    
+    def register(self, event_type: Optional[str] = None, mode: HandlerMode = HandlerMode.ASYNC):
+        """Декоратор регистрации обработчика (функция возвращается без обертки)"""
+        def decorator(func: Callable) -> Callable:
+            if (mode == HandlerMode.ASYNC) != asyncio.iscoroutinefunction(func):
+                raise TypeError(f"Handler {func.__name__} does not match mode {mode.value}")
+            self._handlers[event_type] = (func, mode)
+            return func
+        return decorator
+    
+    def _executor(self, mode: HandlerMode) -> Executor:
+        """Пул для режима (создается при первом использовании)"""
+        if mode == HandlerMode.THREAD:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="handler")
+            return self._thread_pool
+        if self._process_pool is None:
+            # spawn: дочерние процессы не наследуют цикл событий и соединения родителя
+            self._process_pool = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._process_pool
+    
+    def _resolve(self, task_data: dict) -> Optional[tuple[Callable, HandlerMode]]:
+        """Обработчик события сообщения или обработчик по умолчанию"""
+        return self._handlers.get(task_data.get("event")) or self._handlers.get(None)
+    
+    @contextlib.asynccontextmanager
+    async def reserve(self, task_data: dict):
+        """Занять место в пуле процессов для сообщения заранее (для остальных режимов - ничего)"""
+        handler = self._resolve(task_data)
+        if handler is None or handler[1] != HandlerMode.PROCESS or _process_slot_held.get():
+            yield
+            return
+        
+        async with self._process_slots:
+            token = _process_slot_held.set(True)
+            try:
+                yield
+            finally:
+                _process_slot_held.reset(token)
+    
+    async def __call__(self, task_data: dict):
+        """Выполнить обработчик сообщения в его режиме"""
+        handler = self._resolve(task_data)
+        if handler is None:
+            raise PermanentError(f"No handler for event {task_data.get('event')!r}")
+        
+        func, mode = handler
+        if mode == HandlerMode.ASYNC:
+            return await func(task_data)
+        
+        loop = asyncio.get_running_loop()
+        if mode == HandlerMode.THREAD:
+            return await loop.run_in_executor(self._executor(mode), func, task_data)
+        
+        async with self.reserve(task_data):
+            try:
+                return await loop.run_in_executor(self._executor(mode), func, task_data)
+            except BrokenProcessPool:
+                # Процесс пула упал - пересоздаем пул, сообщение уйдет на повтор
+                self._process_pool = None
+                raise
+    
+    async def dispatch_batch(
+        self,
+        tasks: list[dict],
+        batch_handler: Callable[[list[dict]], Awaitable[None]]
+    ) -> None:
+        """Пачка сообщений: события с отдельным обработчиком выполняются им в его режиме,
+        остальные - одним вызовом batch_handler; ошибка любой части - ошибка пачки
+        """
+        own, rest = [], []
+        for task in tasks:
+            event = task.get("event")
+            (own if event is not None and event in self._handlers else rest).append(task)
+        
+        calls = [self(task) for task in own]
+        if rest:
+            calls.append(batch_handler(rest))
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+    
+    def shutdown(self):
+        """Остановить пулы, дождавшись начатых задач"""
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        self._thread_pool = self._process_pool = None
+
+
+registry = HandlerRegistry(
+    threads=settings.WORKER_THREADS,
+    processes=settings.WORKER_PROCESSES,
+    process_queue=settings.WORKER_PROCESS_QUEUE
+)
+
+
+@registry.register()
+async def process_task(task_data: dict):
+    """Обработка задачи из очереди (исключение - сообщение не обработано)"""
+    logger.info(f"Обработка задачи: {task_data}")
+    
+    # Здесь можно добавить логику обработки:
+    # - Отправка уведомлений
+    # - Обновление статусов
+    # - Интеграция с внешними сервисами
+    
+    logger.info(f"Задача обработана: {task_data.get('id')}")
+
+
+@registry.register("task.completed", mode=HandlerMode.PROCESS)
+def render_completion_digest(task_data: dict):
+    """Итог по завершенной задаче (CPU-работа выполняется в пуле процессов)"""
+    task = task_data.get("task") or {}
+    lines = [
+        f"✅ {task.get('title', '')}",
+        f"Приоритет: {task.get('priority', '')}",
+        f"Создана: {task.get('created_at', '')}",
+        f"Завершена: {task.get('completed_at', '')}",
+    ]
+    if task.get("description"):
+        lines.append(task["description"])
+    logger.info("\n".join(lines))
+
+
+def decode_message(message: IncomingMessage) -> dict:
+    """Тело сообщения -> dict, PermanentError при неверном формате"""
+    try:
+        task_data = json.loads(message.body.decode())
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise PermanentError(f"Invalid message body: {e}") from e
+    if not isinstance(task_data, dict):
+        raise PermanentError("Message body must be a JSON object")
+    return task_data
+
+
+class BatchCollector:
+    """Накопитель сообщений одного канала: пачка уходит в обработку по размеру или по таймауту"""
+    
+    def __init__(self, pool: "ConsumerPool", size: int, timeout: float):
+        self.pool = pool
+        self.size = size
+        self.timeout = timeout
+        self.messages: list[IncomingMessage] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Пачки канала обрабатываются по очереди: ack(multiple=True) подтверждает все
+        # сообщения канала до последнего, поэтому предыдущая пачка должна быть завершена
+        self._lock = asyncio.Lock()
+    
+    async def add(self, message: IncomingMessage):
+        """Добавить сообщение в текущую пачку"""
+        self.messages.append(message)
+        if len(self.messages) >= self.size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.timeout, self.flush)
+    
+    def flush(self):
+        """Отправить накопленную пачку в обработку"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.messages:
+            return
+        messages, self.messages = self.messages, []
+        self.pool._spawn(self._process(messages))
+    
+    async def _process(self, messages: list[IncomingMessage]):
+        async with self._lock:
+            await self.pool._handle_batch(messages)
+
+
+class ConsumerPool:
+    """Потребители очереди на нескольких каналах с ограничением числа одновременных обработчиков
+    
+    Сообщение подтверждается только после успешной обработки. При временной ошибке оно
+    переопубликовывается в конец очереди с увеличенным счетчиком повторов, после
+    max_retries (или при PermanentError) - в очередь dead-letter.
+    
+    При batch_size > 0 обработчик получает список сообщений (до batch_size штук или
+    накопленных за batch_timeout секунд с одного канала), пачка подтверждается или
+    возвращается в очередь одной командой с multiple=True.
+    """
+    
+    def __init__(
+        self,
+        url: str,
+        queue_name: str,
+        handler: Callable[[dict], Awaitable[None]],
+        dead_letter_queue: Optional[str] = None,
+        channels: int = 1,
+        prefetch: int = 32,
+        concurrency: int = 50,
+        max_retries: int = 3,
+        batch_size: int = 0,
+        batch_timeout: float = 0.2
+    ):
+        self.url = url
+        self.queue_name = queue_name
+        self.handler = handler
+        self.dead_letter_queue = dead_letter_queue
+        self.channels = channels
+        self.prefetch = prefetch
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._connection: Optional[AbstractRobustConnection] = None
+        self._consumers: list[tuple[AbstractQueue, str]] = []
+        self._collectors: list[BatchCollector] = []
+        self._in_flight: set[asyncio.Task] = set()
+        self._stopping = False
+    
+    async def start(self):
+        """Подключиться и начать потребление на всех каналах"""
+        if self.batch_size > self.prefetch:
+            logger.warning("prefetch меньше размера пачки: пачки будут уходить только по таймауту")
+        
+        self._connection = await connect_robust(self.url)
+        
+        for _ in range(self.channels):
+            channel = await self._connection.channel()
+            # Не больше prefetch неподтвержденных сообщений на канал
+            await channel.set_qos(prefetch_count=self.prefetch)
+            
+            queue = await channel.declare_queue(self.queue_name, durable=True)
+            if self.dead_letter_queue:
+                await channel.declare_queue(self.dead_letter_queue, durable=True)
+            
+            if self.batch_size:
+                collector = BatchCollector(self, self.batch_size, self.batch_timeout)
+                self._collectors.append(collector)
+                consumer_tag = await queue.consume(collector.add)
+            else:
+                consumer_tag = await queue.consume(self._on_message)
+            self._consumers.append((queue, consumer_tag))
+        
+        logger.info(
+            f"🔄 Воркер запущен: каналов {self.channels}, prefetch {self.prefetch}, "
+            f"обработчиков {self.concurrency}, пачка {self.batch_size or 'нет'}"
+        )
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Запустить обработку в отдельной задаче с учетом для дренажа при остановке"""
+        task = asyncio.create_task(coro)
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+        return task
+    
+    async def _on_message(self, message: IncomingMessage):
+        """Запустить обработку сообщения, не блокируя доставку следующих"""
+        self._spawn(self._handle(message))
+    
+    async def _handle(self, message: IncomingMessage):
+        """Обработать одно сообщение"""
+        try:
+            task_data = decode_message(message)
+        except PermanentError as e:
+            logger.error(f"Сообщение отклонено: {e}")
+            await self._dead_letter(message, str(e))
+            return
+        
+        # Место в пуле процессов занимается до общего слота: сообщения, ждущие процесс,
+        # не держат слоты остальных обработчиков
+        reserve = getattr(self.handler, "reserve", None)
+        async with reserve(task_data) if reserve else contextlib.nullcontext():
+            async with self._semaphore:
+                if self._stopping:
+                    # Еще не начатые сообщения возвращаем в очередь другим воркерам
+                    await message.nack(requeue=True)
+                    return
+                
+                await self._process(message, lambda: self.handler(task_data))
+    
+    async def _process(self, message: IncomingMessage, call: Callable[[], Awaitable[None]]):
+        """Выполнить обработчик и явно подтвердить, повторить или отправить в dead-letter"""
         try:
-            task_data = json.loads(message.body.decode())
-            logger.info(f"Обработка задачи: {task_data}")
+            await call()
+        except asyncio.CancelledError:
+            await message.nack(requeue=True)
+            raise
+        except PermanentError as e:
+            logger.error(f"Сообщение отклонено: {e}")
+            await self._dead_letter(message, str(e))
+        except Exception as e:
+            logger.exception(f"Ошибка при обработке задачи: {e}")
+            await self._retry(message, e)
+        else:
+            await message.ack()
+    
+    async def _handle_batch(self, messages: list[IncomingMessage]):
+        """Обработать пачку сообщений одного канала и подтвердить ее одним ack(multiple=True)"""
+        async with self._semaphore:
+            if self._stopping:
+                await messages[-1].nack(multiple=True, requeue=True)
+                return
             
-            # Здесь можно добавить логику обработки:
-            # - Отправка уведомлений
-            # - Обновление статусов
-            # - Интеграция с внешними сервисами
+            batch, payloads = [], []
+            for message in messages:
+                try:
+                    payloads.append(decode_message(message))
+                    batch.append(message)
+                except PermanentError as e:
+                    logger.error(f"Сообщение отклонено: {e}")
+                    await self._dead_letter(message, str(e))
+            if not batch:
+                return
             
-            logger.info(f"Задача обработана: {task_data.get('id')}")
+            try:
+                await self.handler(payloads)
+            except asyncio.CancelledError:
+                await batch[-1].nack(multiple=True, requeue=True)
+                raise
+            except Exception as e:
+                if not any(message.redelivered for message in batch):
+                    logger.warning(f"Пачка из {len(batch)} сообщений возвращена в очередь: {e}")
+                    await batch[-1].nack(multiple=True, requeue=True)
+                    return
+                # Пачка падает повторно - обрабатываем поштучно, чтобы изолировать сбойные сообщения
+                logger.exception(f"Повторная ошибка пачки, обработка по одному: {e}")
+                for message, payload in zip(batch, payloads):
+                    await self._process(message, lambda payload=payload: self.handler([payload]))
+            else:
+                await batch[-1].ack(multiple=True)
+    
+    async def _republish(self, message: IncomingMessage, routing_key: str, headers: dict):
+        """Опубликовать копию сообщения и подтвердить исходное (при ошибке - вернуть в очередь)"""
+        try:
+            await message.channel.basic_publish(
+                message.body,
+                routing_key=routing_key,
+                properties=Message(
+                    message.body,
+                    headers={**(message.headers or {}), **headers},
+                    content_type=message.content_type,
+                    message_id=message.message_id,
+                    delivery_mode=DeliveryMode.PERSISTENT
+                ).properties
+            )
         except Exception as e:
-            logger.error(f"Ошибка при обработке задачи: {e}")
+            logger.error(f"Не удалось переопубликовать сообщение: {e}")
+            await message.nack(requeue=True)
+            return
+        await message.ack()
+    
+    async def _retry(self, message: IncomingMessage, error: Exception):
+        """Повторить сообщение позже или отправить в dead-letter"""
+        retries = int((message.headers or {}).get(RETRY_HEADER, 0))
+        if retries >= self.max_retries:
+            await self._dead_letter(message, f"Retries exhausted: {error}")
+            return
+        await self._republish(message, self.queue_name, {RETRY_HEADER: retries + 1})
+    
+    async def _dead_letter(self, message: IncomingMessage, reason: str):
+        """Отправить сообщение в очередь dead-letter (или отбросить, если она не задана)"""
+        if not self.dead_letter_queue:
+            await message.reject(requeue=False)
+            return
+        await self._republish(message, self.dead_letter_queue, {"x-error": reason[:255]})
+    
+    async def stop(self, timeout: float = 30.0):
+        """Остановить потребление и дождаться текущих обработчиков"""
+        self._stopping = True
+        
+        # Новые сообщения больше не доставляются; уже полученные дорабатываются
+        for queue, consumer_tag in self._consumers:
+            try:
+                await queue.cancel(consumer_tag)
+            except Exception as e:
+                logger.warning(f"Не удалось отменить потребителя {consumer_tag}: {e}")
+        self._consumers.clear()
+        
+        # Накопленные пачки возвращаются в очередь без обработки
+        for collector in self._collectors:
+            collector.flush()
+        
+        if self._in_flight:
+            logger.info(f"Ожидание {len(self._in_flight)} обработчиков...")
+            _, pending = await asyncio.wait(set(self._in_flight), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.warning(f"Прервано обработчиков по таймауту: {len(pending)}")
+        
+        if self._connection:
+            await self._connection.close()
+            self._connection = None
 
 
-async def main():
-    """Главная функция воркера"""
-    connection = await connect_robust(settings.RABBITMQ_URL)
-    channel = await connection.channel()
+async def process_task_batch(tasks: list[dict]):
+    """Пакетная обработка задач без отдельного обработчика события: одна запись в БД на пачку"""
+    logger.info(f"Обработка пачки задач: {len(tasks)}")
     
-    # Объявление очереди
-    queue = await channel.declare_queue("task_queue", durable=True)
+    # Здесь можно добавить пакетную логику, например один multi-row INSERT/UPDATE
     
-    logger.info("🔄 Воркер запущен, ожидание задач...")
+    logger.info(f"Пачка обработана: {[task.get('id') for task in tasks]}")
+
+
+async def dispatch_task_batch(tasks: list[dict]):
+    """Обработчик пакетного режима (WORKER_BATCH_SIZE > 0): события с обработчиком
+    в registry (например, task.completed в пуле процессов) выполняются им
+    """
+    await registry.dispatch_batch(tasks, process_task_batch)
+
+
+async def main():
+    """Главная функция воркера"""
+    pool = ConsumerPool(
+        settings.RABBITMQ_URL,
+        settings.WORKER_QUEUE,
+        dispatch_task_batch if settings.WORKER_BATCH_SIZE else registry,
+        dead_letter_queue=settings.WORKER_DEAD_LETTER_QUEUE,
+        channels=settings.WORKER_CHANNELS,
+        prefetch=settings.WORKER_PREFETCH,
+        concurrency=settings.WORKER_CONCURRENCY,
+        max_retries=settings.WORKER_MAX_RETRIES,
+        batch_size=settings.WORKER_BATCH_SIZE,
+        batch_timeout=settings.WORKER_BATCH_TIMEOUT
+    )
     
-    # Подписка на очередь
-    await queue.consume(process_task)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
     
+    await pool.start()
     try:
-        await asyncio.Future()  # Бесконечное ожидание
+        await stop.wait()
+        logger.info("Получен сигнал остановки, завершаем обработку...")
     finally:
-        await connection.close()
+        await pool.stop(settings.WORKER_DRAIN_TIMEOUT)
+        await asyncio.to_thread(registry.shutdown)
+    logger.info("Воркер остановлен")
 
 
 if __name__ == "__main__":
     asyncio.run(main())
-